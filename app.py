@@ -1,12 +1,14 @@
 """
 Streamlit app for generating viral Instagram hooks for food content.
 Integrates with Langflow API to generate hook recommendations.
+Runs execute on a background job queue shared by all sessions; the page polls for progress.
 """
 
 import streamlit as st
-from instagram_hook_chain import run_full_chain
 from config import Config
+from job_queue import CANCELLED, DONE, FINISHED, QUEUED, get_job_queue
 import time
+import uuid
 
 
 # Page configuration
@@ -17,6 +19,18 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Seconds between progress refreshes while a background run is in progress
+POLL_SECONDS = 0.5
+
+# Progress labels for each graph node while a run is streaming
+NODE_LABELS = {
+    "generate_hook": "✍️ Generator is writing a hook",
+    "programmatic_check": "📏 Checking the hook rules",
+    "verify_personas": "👀 Personas are reacting",
+    "manager_evaluation": "🧑‍💼 Manager is reviewing",
+    "finalize_hook": "🎬 Finalizer is writing the production card",
+}
+
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -103,6 +117,12 @@ def initialize_session_state():
         st.session_state.results = {}
     if "last_description" not in st.session_state:
         st.session_state.last_description = ""
+    if "job_id" not in st.session_state:
+        # Background run started by this session (see job_queue)
+        st.session_state.job_id = None
+    if "pending_run" not in st.session_state:
+        # Run that has started but not finished: {"description", "run_id"}
+        st.session_state.pending_run = None
 
 
 def display_header():
@@ -172,34 +192,111 @@ def display_hooks(results: dict):
                 st.markdown("**Programmatic Checks:**")
                 st.markdown(attempt.get("programmatic_feedback", "N/A"))
                 
+                if attempt.get("candidates"):
+                    st.markdown("**Candidates:**")
+                    for candidate in attempt["candidates"]:
+                        if not candidate.get("passed", True):
+                            st.markdown(f"- ❌ \"{candidate['hook']}\" — {candidate.get('programmatic_feedback', '')}")
+                        elif "mean_score" in candidate:
+                            st.markdown(f"- ✅ \"{candidate['hook']}\" — persona score {candidate['mean_score']}/10")
+                        else:
+                            st.markdown(f"- ✅ \"{candidate['hook']}\"")
+
                 st.markdown("**Audience Verifiers (Personas):**")
                 for fdbk in attempt.get("verifier_feedback", []):
                     st.markdown(fdbk)
                     
-                st.markdown("**Manager Decision:**")
+                if attempt.get("decided_by") == "fast_path":
+                    st.markdown("**Manager Decision:** _(decided automatically from persona scores)_")
+                else:
+                    st.markdown("**Manager Decision:**")
                 st.markdown(manager_decision)
+                
+                timing = attempt.get("metrics")
+                if timing:
+                    st.caption(
+                        f"⏱️ {timing.get('seconds', 0):.1f}s · {timing['llm_calls']} LLM calls "
+                        f"({timing['cache_hits']} cached) · {timing['input_tokens']} in / {timing['output_tokens']} out tokens"
+                        + (f" · ${timing['cost_usd']:.4f}" if timing.get("cost_usd") else "")
+                    )
+
+
+def display_error(error: str):
+    """Show a failed run's error with a hint on how to continue."""
+    st.markdown(f'<div class="error-message">❌ Error: {error}</div>', unsafe_allow_html=True)
+    st.info("💡 Make sure your GEMINI_API_KEY is correct in your .env file. "
+            "Click Generate again to continue from the last completed step.")
 
 
-def generate_hooks(video_description: str):
-    """Generate hooks using LangChain workflow."""
+def start_generation(video_description: str):
+    """
+    Submit a workflow run to the shared background job queue and keep its job ID in the session.
+    
+    Returns:
+        An error message if the run could not be started, otherwise None
+    """
     try:
         # Validate configuration
         Config.validate()
-        
-        # Show loading state
-        with st.spinner("🤖 Running AI Content Stratgist Chain... This may take a moment."):
-            # Call LangChain workflow
-            results = run_full_chain(video_description)
-            
-            # Store in session state
-            st.session_state.results = results
-            st.session_state.last_description = video_description
-            
-            return results, None
-            
-    except Exception as e:
-        error_message = str(e)
-        return None, error_message
+    except ValueError as e:
+        return str(e)
+    
+    # Reattach to the checkpointed run if the last attempt for this description didn't finish
+    pending = st.session_state.pending_run
+    if pending and pending["description"] == video_description:
+        run_id = pending["run_id"]
+    else:
+        run_id = uuid.uuid4().hex
+        st.session_state.pending_run = {"description": video_description, "run_id": run_id}
+    
+    st.session_state.job_id = get_job_queue().submit(video_description, run_id)
+    return None
+
+
+def poll_job(job_id: str):
+    """Render the progress of the session's background job, polling until it has finished."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        # Expired, or the app process was restarted
+        st.session_state.job_id = None
+        display_error("The run is no longer available.")
+        return
+    
+    if job["status"] in FINISHED:
+        st.session_state.job_id = None
+        if job["status"] == DONE:
+            st.session_state.results = job["result"]
+            st.session_state.last_description = job["description"]
+            st.session_state.pending_run = None
+            st.success("✅ Workflow complete!")
+            display_hooks(job["result"])
+        elif job["status"] == CANCELLED:
+            st.warning("⏹️ Run cancelled. Click Generate to continue it from the last completed step.")
+        else:
+            display_error(job["error"])
+        return
+    
+    node = job["streaming_node"]
+    if job["status"] == QUEUED:
+        st.info("⏳ Waiting for a free worker...")
+    elif node:
+        st.info(NODE_LABELS.get(node, node) + "...")
+    elif job["resumed"]:
+        st.info("🔁 Continuing your previous run from where it stopped...")
+    else:
+        st.info("🤖 Running AI Content Strategist Chain...")
+    
+    if st.button("⏹️ Cancel", key="cancel_job"):
+        get_job_queue().cancel(job_id)
+    
+    # Persona reactions arrive interleaved, so only their status is shown
+    if node and node != "verify_personas":
+        st.markdown(job["streamed_text"])
+    if job["state"].get("history") or job["state"].get("final_output"):
+        display_hooks(job["state"])
+    
+    time.sleep(POLL_SECONDS)
+    st.rerun()
 
 
 def main():
@@ -210,22 +307,21 @@ def main():
     # Input section
     video_description, generate_button = display_input_section()
     
-    # Generate hooks on button click
+    # Start a background run on button click
     if generate_button:
         if not video_description or len(video_description.strip()) < 10:
             st.error("⚠️ Please enter a more detailed description (at least 10 characters).")
+        elif st.session_state.job_id:
+            st.warning("⏳ A run is already in progress. Wait for it to finish or cancel it.")
         else:
-            results, error = generate_hooks(video_description.strip())
-            
+            error = start_generation(video_description.strip())
             if error:
-                st.markdown(f'<div class="error-message">❌ Error: {error}</div>', unsafe_allow_html=True)
-                st.info("💡 Make sure your GEMINI_API_KEY is correct in your .env file.")
-            elif results:
-                st.success("✅ Workflow complete!")
-                display_hooks(results)
+                display_error(error)
     
-    # Display previous result if available
-    elif st.session_state.results:
+    # Progress of the running job, or the previous result if available
+    if st.session_state.job_id:
+        poll_job(st.session_state.job_id)
+    elif st.session_state.results and not generate_button:
         st.info("💡 Enter a new description above to generate more hooks, or view your previous results below:")
         display_hooks(st.session_state.results)
     
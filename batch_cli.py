@@ -0,0 +1,183 @@
+"""
+Batch entry point for running the hook chain over many recipe descriptions.
+Reads CSV or JSONL, runs the workflow with a bounded worker pool and streams each
+finished result to an output JSONL file. Re-running with the same output file resumes
+the batch by skipping IDs that already completed.
+
+Usage:
+    python batch_cli.py recipes.csv --output hooks.jsonl --workers 8
+    python batch_cli.py --profile-startup        # cold-start report, then exit
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Dict, Any, Iterator, Optional, Set
+
+from config import Config
+
+
+def _item_id(row: Dict[str, Any], id_field: str, text: str) -> str:
+    """Use the row's ID if present, otherwise a stable hash of the description."""
+    value = row.get(id_field)
+    if value not in (None, ""):
+        return str(value)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def read_items(path: str, id_field: str = "id", text_field: str = "recipe_description") -> Iterator[Dict[str, str]]:
+    """
+    Yield {"id", "recipe_description"} items from a CSV or JSONL file.
+
+    Rows without a description are skipped with a warning.
+    """
+    is_jsonl = path.endswith((".jsonl", ".ndjson"))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if is_jsonl:
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        for line_no, row in enumerate(rows, start=1):
+            text = (row.get(text_field) or "").strip()
+            if not text:
+                print(f"Skipping row {line_no}: no '{text_field}' value", file=sys.stderr)
+                continue
+            yield {"id": _item_id(row, id_field, text), "recipe_description": text}
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """IDs already written successfully to the output file (errored items are retried)."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a truncated last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def run_item(item: Dict[str, str]) -> Dict[str, Any]:
+    """Run the chain for one item and turn the outcome into an output record."""
+    from instagram_hook_chain import run_full_chain
+
+    start = time.perf_counter()
+    record = {"id": item["id"], "recipe_description": item["recipe_description"]}
+    try:
+        # Batch runs yield to interactive sessions in the shared LLM scheduler. The run ID is
+        # derived from the item ID, so retrying a failed item continues its checkpointed run.
+        result = run_full_chain(item["recipe_description"], priority="batch", run_id=f"batch-{item['id']}")
+        record.update({
+            "status": "ok",
+            "hook": result.get("current_hook", ""),
+            "is_approved": result.get("is_approved", False),
+            "iterations": result.get("iterations", 0),
+            "final_output": result.get("final_output", ""),
+            "history": [entry.to_dict() for entry in result.get("history", [])],
+            "metrics": result.get("metrics", {}),
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 4, resume: bool = True,
+              id_field: str = "id", text_field: str = "recipe_description",
+              limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Run the chain over every item in `input_path`, appending one JSON line per finished item.
+
+    Returns:
+        Counts of completed, failed and skipped items.
+    """
+    done = load_completed_ids(output_path) if resume else set()
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+
+    mode = "a" if resume else "w"
+    with open(output_path, mode, encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        def write(record: Dict[str, Any]):
+            # Only the submitting thread writes, so lines never interleave
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            print(f"[{record['status']}] {record['id']} ({record['elapsed_seconds']}s)", file=sys.stderr)
+
+        # Keep at most 2x workers items in flight so huge inputs are never fully loaded
+        pending = set()
+        submitted = 0
+        for item in read_items(input_path, id_field, text_field):
+            if item["id"] in done:
+                counts["skipped"] += 1
+                continue
+            if limit is not None and submitted >= limit:
+                break
+            done.add(item["id"])  # also de-duplicates repeated IDs within the input
+            pending.add(executor.submit(run_item, item))
+            submitted += 1
+
+            # Write every finished item right away so an interrupted batch doesn't redo it on resume;
+            # block only when the in-flight window is full
+            full = len(pending) >= workers * 2
+            finished, pending = wait(pending, timeout=None if full else 0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                write(future.result())
+
+        for future in as_completed(pending):
+            write(future.result())
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the viral hook chain over a CSV/JSONL file of recipes.")
+    parser.add_argument("input", nargs="?", help="CSV or JSONL file with one recipe per row")
+    parser.add_argument("-o", "--output", help="Output JSONL file (appended to when resuming)")
+    parser.add_argument("-w", "--workers", type=int, default=Config.BATCH_WORKERS,
+                        help=f"Concurrent workflow runs (default: {Config.BATCH_WORKERS})")
+    parser.add_argument("--id-field", default="id", help="Column/key holding the item ID (default: id)")
+    parser.add_argument("--text-field", default="recipe_description",
+                        help="Column/key holding the recipe description (default: recipe_description)")
+    parser.add_argument("--limit", type=int, help="Only run this many new items")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+    parser.add_argument("--metrics-out",
+                        help="Write per-node latency/token metrics here when done (.jsonl = JSON lines, else Prometheus text)")
+    parser.add_argument("--profile-startup", nargs="?", const="text", choices=["text", "json"],
+                        help="Report cold-start time per phase and the slowest imports, then exit")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        import startup_profile
+        startup_profile.main(args.profile_startup)
+        return 0
+    if not args.input or not args.output:
+        parser.error("the following arguments are required: input, -o/--output")
+
+    Config.validate()
+    counts = run_batch(
+        args.input, args.output, workers=max(1, args.workers), resume=not args.no_resume,
+        id_field=args.id_field, text_field=args.text_field, limit=args.limit,
+    )
+    print(f"Done: {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} skipped (already done)",
+          file=sys.stderr)
+
+    if args.metrics_out:
+        from metrics import REGISTRY
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(REGISTRY.to_json_lines() if args.metrics_out.endswith(".jsonl") else REGISTRY.to_prometheus())
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Threads vs asyncio for many concurrent workflow runs.
+
+Starts N runs at once against a fake model that adds artificial latency to every call:
+"threads" runs each one with run_workflow on its own thread (one parked thread per
+in-flight run), "async" gathers arun_workflow coroutines on a single event loop. Each mode
+runs in a fresh subprocess and reports wall time, throughput, peak thread count and peak
+RSS growth per in-flight run; async runs also report the event loop's p99 and worst lag
+(how late a 5 ms timer fires). The scheduler's concurrency cap is lifted. Both modes are
+measured with the default settings (response cache and checkpointing on, in a fresh temporary
+directory) and with both turned off ("bare"), which isolates the concurrency model.
+
+Usage:
+    python benchmarks/bench_async.py --runs 200 --latency 0.2
+    python benchmarks/bench_async.py --runs 200 --config defaults
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ.update(LLM_MAX_CONCURRENCY="100000")
+
+CONFIGS = ("defaults", "bare")
+
+
+def configure(config: str, directory: str):
+    """Environment for one measured process (set before config.py is imported)."""
+    if config == "bare":
+        os.environ.update(LLM_CACHE_ENABLED="false", CHECKPOINT_ENABLED="false")
+    else:
+        # Fresh files, so no run is answered from an earlier benchmark's cache
+        os.environ.update(LLM_CACHE_PATH=os.path.join(directory, "llm_cache.sqlite3"),
+                          CHECKPOINT_PATH=os.path.join(directory, "checkpoints.sqlite3"))
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class PeakSampler(threading.Thread):
+    """Samples RSS and the live thread count every few milliseconds."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak_rss = rss_bytes()
+        self.peak_threads = threading.active_count()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(0.005):
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+
+async def probe_loop_lag(lags: list, stopped: asyncio.Event, interval: float = 0.005):
+    """Record how late a timer fires while the runs share the loop (blocking calls delay it)."""
+    while not stopped.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+def measure(mode: str, config: str, runs: int, latency: float) -> dict:
+    import instagram_hook_chain as chain
+    from benchmarks.fake_llm import FakeChatModel
+    from metrics import percentile
+
+    chain.llm = FakeChatModel(latency=latency)
+    recipes = [f"Sample recipe #{i}" for i in range(runs)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up: compile the graph and load prompts before measuring
+        chain.run_workflow("warm-up")
+        asyncio.run(chain.arun_workflow("warm-up"))
+
+        baseline = rss_bytes()
+        sampler = PeakSampler()
+        sampler.start()
+        start = time.perf_counter()
+        lags = []
+        if mode == "threads":
+            with ThreadPoolExecutor(max_workers=runs) as pool:
+                results = list(pool.map(chain.run_workflow, recipes))
+        else:
+            async def gather():
+                stopped = asyncio.Event()
+                probe = asyncio.create_task(probe_loop_lag(lags, stopped))
+                results = await asyncio.gather(*(chain.arun_workflow(r) for r in recipes))
+                stopped.set()
+                await probe
+                return results
+            results = asyncio.run(gather())
+        elapsed = time.perf_counter() - start
+        sampler.stopped.set()
+        sampler.join()
+
+    assert all(r["final_output"] for r in results)
+    return {
+        "mode": mode,
+        "config": config,
+        "runs": runs,
+        "seconds": round(elapsed, 3),
+        "runs_per_second": round(runs / elapsed, 1),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 1) if lags else None,
+        "loop_lag_max_ms": round(max(lags) * 1000, 1) if lags else None,
+        "peak_threads": sampler.peak_threads,
+        "rss_per_run_kib": round((sampler.peak_rss - baseline) / runs / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake model call")
+    parser.add_argument("--config", choices=CONFIGS, help="only this configuration (default: both)")
+    parser.add_argument("--mode", choices=["threads", "async"], help="measure one mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        with tempfile.TemporaryDirectory() as directory:
+            configure(args.config or "defaults", directory)
+            print(json.dumps(measure(args.mode, args.config or "defaults", args.runs, args.latency)))
+        return
+
+    for config in [args.config] if args.config else CONFIGS:
+        for mode in ("threads", "async"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--config", config,
+                 "--runs", str(args.runs), "--latency", str(args.latency)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            lag = (f", loop lag p99 {r['loop_lag_p99_ms']} ms / max {r['loop_lag_max_ms']} ms"
+                   if r["loop_lag_p99_ms"] is not None else "")
+            print(f"{config:>8} {mode:>7}: {r['runs']} runs in {r['seconds']:.2f}s ({r['runs_per_second']} runs/s), "
+                  f"peak threads {r['peak_threads']}, +{r['rss_per_run_kib']} KiB RSS per in-flight run{lag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Counts LLM calls per run with the programmatic rules gate in front of the reviewers.
+
+Each corpus entry is the sequence of hooks the generator produces for one recipe. The fake
+manager approves every hook it sees, so a run ends at the first hook that passes
+manual_checks (or after 3 iterations). Before the gate, every iteration cost
+1 generator + 3 persona + 1 manager call regardless of the rules; the "before" column
+is that count for the same sequence.
+
+Usage:
+    python benchmarks/bench_gate_savings.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+import instagram_hook_chain as chain  # noqa: E402
+from benchmarks.fake_llm import DEFAULT_RESPONSES, FakeChatModel  # noqa: E402
+from config import Config  # noqa: E402
+
+# Generator output per iteration for each recipe, modelled on hooks rejected in production
+CORPUS = [
+    ["Garlic first is killing your pasta"],
+    ["Hey guys, today I'm making the creamiest garlic butter pasta ever", "Your pasta is missing ONE thing"],
+    ["This five minute mug brownie recipe will honestly change your entire late night snack game",
+     "5-minute brownies — just a mug"],
+    ["Let's make the fluffiest idli batter at home", "Welcome back to my kitchen, soft idlis today",
+     "Stop soaking rice overnight for idli"],
+    ["You're wasting the best part of chicken"],
+    ["Today we're making dal tadka the way my nani did it every Sunday afternoon",
+     "Hi I'm Riya and this dal changed my life", "Hey guys, nani's dal secret"],
+    ["Why MSG makes everything taste better"],
+    ["If you've eaten cereal for dinner"],
+]
+
+MAX_ITERATIONS = 3
+CALLS_PER_REVIEWED_ITERATION = 1 + len(chain.PERSONAS) + 1
+
+
+def calls_before_gate(hooks: list) -> int:
+    """LLM calls the same run cost when every iteration went through personas and manager."""
+    calls = 0
+    for iteration, hook in enumerate(hooks[:MAX_ITERATIONS], start=1):
+        calls += CALLS_PER_REVIEWED_ITERATION
+        if chain.manual_checks(hook)[0] or iteration == MAX_ITERATIONS:
+            break
+    return calls + 1  # finalizer
+
+
+def main():
+    Config.LLM_CACHE_ENABLED = False
+
+    total_before = total_after = 0
+    print(f"{'recipe':>6} {'iterations':>10} {'before':>7} {'after':>6}")
+    for index, hooks in enumerate(CORPUS, start=1):
+        model = FakeChatModel(responses={**DEFAULT_RESPONSES, "HOOK GENERATOR": hooks})
+        chain.llm = model
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = chain.run_workflow(f"Sample recipe #{index}")
+
+        before = calls_before_gate(hooks)
+        total_before += before
+        total_after += model.calls
+        print(f"{index:>6} {result['iterations']:>10} {before:>7} {model.calls:>6}")
+
+    runs = len(CORPUS)
+    print(f"\nLLM calls per run: {total_before / runs:.2f} before gate, {total_after / runs:.2f} after "
+          f"({total_before - total_after} calls saved over {runs} runs, "
+          f"{(total_before - total_after) / total_before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tail latency of persona-style calls with and without hedged requests.
+
+The fake model answers in 20 ms, except 5% of calls that straggle for 400 ms. Each mode
+makes the same number of calls through call_with_budget from a few threads and reports
+p50/p99 latency, the extra calls hedging sent and how often the duplicate won.
+
+Usage:
+    python benchmarks/bench_hedging.py --calls 400
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+import llm_hedging  # noqa: E402
+import metrics  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+from config import Config  # noqa: E402
+
+NODE = "verify_personas"
+
+
+def run(calls: int, hedge: bool) -> dict:
+    Config.LLM_HEDGE_ENABLED = hedge
+    llm_hedging.reset()
+    metrics.REGISTRY.reset()
+    # Seeded, so both modes (and every run) see the same stragglers in the same call order
+    model = FakeChatModel(latency=0.02, straggler_rate=0.05, straggler_latency=0.4, seed=7)
+
+    def one(_):
+        start = time.perf_counter()
+        llm_hedging.call_with_budget(NODE, lambda timeout, cancelled, primary: model.invoke("PERSONA SIMULATION",
+                                                                                          timeout=timeout))
+        return time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=4) as pool:
+        latencies = list(pool.map(one, range(calls)))
+
+    counters = {c["name"]: c["value"] for c in metrics.REGISTRY.snapshot()["counters"]}
+    return {
+        "p50": metrics.percentile(latencies, 50) * 1000,
+        "p99": metrics.percentile(latencies, 99) * 1000,
+        "model_calls": model.calls,
+        "hedges": counters.get("llm_hedges_total", 0),
+        "hedge_wins": counters.get("llm_hedge_wins_total", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    args = parser.parse_args()
+
+    for label, hedge in (("plain", False), ("hedged", True)):
+        r = run(args.calls, hedge)
+        print(f"{label:>7}: p50 {r['p50']:6.1f} ms  p99 {r['p99']:6.1f} ms  "
+              f"model calls {r['model_calls']} (+{r['model_calls'] - args.calls} extra)  "
+              f"hedges {r['hedges']:g}, won {r['hedge_wins']:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of LangflowClient against a local stub server with simulated latency.
+
+Compares the previous path (module-level requests.post, one request at a time, a new
+connection each time), the pooled session sent sequentially, and generate_hooks_many.
+Also reports time to the first hook for the streamed endpoint vs. the blocking one.
+
+Usage:
+    python benchmarks/bench_langflow_client.py --requests 64 --latency 0.05 --concurrency 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.langflow_stub import StubLangflowServer  # noqa: E402
+from langflow_client import LangflowClient  # noqa: E402
+
+
+def bench(label: str, server: StubLangflowServer, fn, n: int):
+    requests_before, connections_before = server.requests, server.connections
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:7.2f} s   {n / elapsed:7.1f} req/s   "
+          f"{server.connections - connections_before:>4} connections for {server.requests - requests_before} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server latency per request (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    descriptions = [f"Recipe #{i}: garlic butter pasta" for i in range(args.requests)]
+    with StubLangflowServer(latency=args.latency) as server:
+        def one_at_a_time_unpooled():
+            for description in descriptions:
+                requests.post(server.url, json={"input_value": description}, timeout=30).json()
+
+        with LangflowClient(api_url=server.url) as client:
+            bench("requests.post, sequential", server, one_at_a_time_unpooled, args.requests)
+            bench("pooled session, sequential", server,
+                  lambda: [client.generate_hooks(d) for d in descriptions], args.requests)
+            bench(f"generate_hooks_many (x{args.concurrency})", server,
+                  lambda: client.generate_hooks_many(descriptions, max_concurrency=args.concurrency), args.requests)
+
+            start = time.perf_counter()
+            client.parse_hooks_response(client.generate_hooks(descriptions[0]))
+            blocking = time.perf_counter() - start
+            start = time.perf_counter()
+            next(iter(client.generate_hooks_stream(descriptions[0])))
+            streamed = time.perf_counter() - start
+            print(f"\ntime to first hook: blocking {blocking * 1000:.0f} ms, streamed {streamed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
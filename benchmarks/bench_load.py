@@ -0,0 +1,422 @@
+"""
+Load generator: how many simultaneous workflow runs one process sustains before latency collapses.
+
+Drives run_workflow (threads) or arun_workflow (async) against the offline fake model, either
+open loop at a target arrival rate (--rate, Poisson arrivals) or closed loop with a fixed number
+of runs in flight (--concurrency). The fake model's latency, stragglers and error rates are
+configurable. Every --sample-interval the RSS, live thread count, runs in flight and runs
+waiting to start are recorded.
+
+The JSON report (--output) holds the settings, the commit it ran on, a summary (throughput,
+queueing delay, end-to-end and service-time p50/p99, error rate, memory growth, peak threads)
+and the timeline, so reports from different commits can be compared with --compare.
+--sweep runs one level per fresh subprocess and prints the last level before p99 latency collapses.
+
+Usage:
+    python benchmarks/bench_load.py --rate 20 --duration 30 --latency 0.3
+    python benchmarks/bench_load.py --concurrency 64 --engine async --error-rate 0.01
+    python benchmarks/bench_load.py --rate 10 --sweep 10,20,40,80 --output load.json
+    python benchmarks/bench_load.py --rate 20 --compare load-main.json --output load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ.update(LLM_CACHE_ENABLED="false", CHECKPOINT_ENABLED="false", RESULTS_STORE_PATH="")
+
+# Summary fields printed by --compare, and whether lower is better
+COMPARED = {
+    "throughput_rps": False,
+    "latency_p50_ms": True,
+    "latency_p99_ms": True,
+    "queue_delay_p99_ms": True,
+    "llm_queue_wait_p95_ms": True,
+    "error_rate": True,
+    "rss_growth_mib": True,
+    "peak_threads": True,
+}
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class LoadStats:
+    """Per-run timings and the live in-flight/waiting counts, shared by the drivers and the sampler."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.arrivals = 0
+        self.completed = 0
+        self.errors = {}
+        self.latency, self.service, self.queue_delay = [], [], []
+        self.llm_calls = 0
+        self.window_end = float("inf")
+
+    def arrived(self):
+        with self.lock:
+            self.arrivals += 1
+            self.waiting += 1
+
+    def started(self, arrival: float) -> float:
+        now = time.perf_counter()
+        with self.lock:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.queue_delay.append(now - arrival)
+        return now
+
+    def finished(self, arrival: float, start: float, result=None, error: Exception = None):
+        now = time.perf_counter()
+        with self.lock:
+            self.in_flight -= 1
+            if error is not None:
+                name = type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return
+            self.completed += 1
+            self.latency.append(now - arrival)
+            self.service.append(now - start)
+            self.llm_calls += result["metrics"]["llm_calls"]
+
+
+class Sampler(threading.Thread):
+    """Records RSS, live threads and the run counts every `interval` seconds."""
+
+    def __init__(self, stats: LoadStats, interval: float, origin: float):
+        super().__init__(daemon=True)
+        self.stats, self.interval, self.origin = stats, interval, origin
+        self.timeline = []
+        self.stopped = threading.Event()
+
+    def sample(self):
+        with self.stats.lock:
+            counts = {
+                "in_flight": self.stats.in_flight,
+                "waiting": self.stats.waiting,
+                "completed": self.stats.completed,
+                "errors": sum(self.stats.errors.values()),
+            }
+        self.timeline.append({
+            "t": round(time.perf_counter() - self.origin, 3),
+            "rss_mib": round(rss_bytes() / 2 ** 20, 1),
+            "threads": threading.active_count(),
+            **counts,
+        })
+
+    def run(self):
+        self.sample()
+        while not self.stopped.wait(self.interval):
+            self.sample()
+        self.sample()
+
+
+def arrival_times(rate: float, duration: float, seed: int) -> list:
+    """Poisson arrivals at `rate` per second over `duration` seconds, as offsets from the start."""
+    rng, t, times = random.Random(seed), 0.0, []
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+def recipe(i: int) -> str:
+    # Distinct descriptions so no layer can serve one run from another's work
+    return f"Load test recipe #{i}: one-pan garlic butter pasta"
+
+
+def drive_threads(chain, stats: LoadStats, args, origin: float):
+    def job(i: int, arrival: float):
+        start = stats.started(arrival)
+        try:
+            stats.finished(arrival, start, chain.run_workflow(recipe(i)))
+        except Exception as e:
+            stats.finished(arrival, start, error=e)
+
+    if args.rate:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for i, offset in enumerate(arrival_times(args.rate, args.duration, args.seed)):
+                time.sleep(max(0.0, origin + offset - time.perf_counter()))
+                stats.arrived()
+                pool.submit(job, i, origin + offset)
+        return
+
+    counter = itertools.count()
+
+    def worker():
+        while time.perf_counter() < stats.window_end:
+            stats.arrived()
+            job(next(counter), time.perf_counter())
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+async def drive_async(chain, stats: LoadStats, args, origin: float):
+    slots = asyncio.Semaphore(args.workers)
+
+    async def job(i: int, arrival: float):
+        async with slots:
+            start = stats.started(arrival)
+            try:
+                stats.finished(arrival, start, await chain.arun_workflow(recipe(i)))
+            except Exception as e:
+                stats.finished(arrival, start, error=e)
+
+    if args.rate:
+        tasks = []
+        for i, offset in enumerate(arrival_times(args.rate, args.duration, args.seed)):
+            await asyncio.sleep(max(0.0, origin + offset - time.perf_counter()))
+            stats.arrived()
+            tasks.append(asyncio.create_task(job(i, origin + offset)))
+        await asyncio.gather(*tasks)
+        return
+
+    counter = itertools.count()
+
+    async def worker():
+        while time.perf_counter() < stats.window_end:
+            stats.arrived()
+            await job(next(counter), time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+def _ms(values: list, q: float) -> float:
+    from metrics import percentile
+    return round(percentile(values, q) * 1000, 1)
+
+
+def run_level(args) -> dict:
+    """Run one load level in this process and return its report."""
+    import instagram_hook_chain as chain
+    from benchmarks.fake_llm import FakeChatModel
+    from config import Config
+    from metrics import REGISTRY
+
+    chain.llm = FakeChatModel(
+        latency=args.latency, straggler_rate=args.straggler_rate, straggler_latency=args.straggler_latency,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up: compile the graph and load prompts before measuring
+        chain.run_workflow("warm-up")
+        asyncio.run(chain.arun_workflow("warm-up"))
+    REGISTRY.reset()
+
+    stats = LoadStats()
+    origin = time.perf_counter()
+    stats.window_end = origin + args.duration
+    sampler = Sampler(stats, args.sample_interval, origin)
+    sampler.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.engine == "threads":
+            drive_threads(chain, stats, args, origin)
+        else:
+            asyncio.run(drive_async(chain, stats, args, origin))
+    elapsed = time.perf_counter() - origin
+    sampler.stopped.set()
+    sampler.join()
+
+    timeline = sampler.timeline
+    failed = sum(stats.errors.values())
+    wait = REGISTRY.snapshot()["latency"].get("queue_wait:interactive", {})
+    summary = {
+        "started": stats.completed + failed,
+        "completed": stats.completed,
+        "errors": failed,
+        "error_types": stats.errors,
+        "error_rate": round(failed / max(1, stats.completed + failed), 4),
+        "offered_rps": round(stats.arrivals / args.duration, 2) if args.rate else None,
+        # Includes the drain, so an overloaded level reports what it actually served
+        "throughput_rps": round(stats.completed / elapsed, 2),
+        "drain_seconds": round(max(0.0, elapsed - args.duration), 2),
+        "latency_p50_ms": _ms(stats.latency, 50),
+        "latency_p99_ms": _ms(stats.latency, 99),
+        "service_p50_ms": _ms(stats.service, 50),
+        "service_p99_ms": _ms(stats.service, 99),
+        "queue_delay_p50_ms": _ms(stats.queue_delay, 50),
+        "queue_delay_p99_ms": _ms(stats.queue_delay, 99),
+        "llm_queue_wait_p50_ms": round(wait.get("p50", 0.0) * 1000, 1),
+        "llm_queue_wait_p95_ms": round(wait.get("p95", 0.0) * 1000, 1),
+        "llm_calls_per_run": round(stats.llm_calls / stats.completed, 2) if stats.completed else None,
+        "rss_start_mib": timeline[0]["rss_mib"],
+        "rss_peak_mib": max(s["rss_mib"] for s in timeline),
+        "rss_growth_mib": round(timeline[-1]["rss_mib"] - timeline[0]["rss_mib"], 1),
+        "peak_threads": max(s["threads"] for s in timeline),
+        "peak_in_flight": max(s["in_flight"] for s in timeline),
+        "peak_waiting": max(s["waiting"] for s in timeline),
+    }
+    return {
+        "commit": git_commit(),
+        "settings": {
+            "engine": args.engine,
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+            "latency": args.latency,
+            "straggler_rate": args.straggler_rate,
+            "straggler_latency": args.straggler_latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "llm_max_concurrency": Config.LLM_MAX_CONCURRENCY,
+            "persona_mode": Config.PERSONA_MODE,
+        },
+        "summary": summary,
+        "timeline": timeline,
+    }
+
+
+def level_label(report: dict) -> str:
+    s = report["settings"]
+    return f"{s['rate']:g}/s" if s["rate"] else f"{s['concurrency']} in flight"
+
+
+def print_summary(report: dict):
+    s = report["summary"]
+    print(f"{report['settings']['engine']} @ {level_label(report)}: {s['completed']} runs, {s['errors']} errors "
+          f"({s['error_rate']:.1%}), {s['throughput_rps']} runs/s"
+          + (f" of {s['offered_rps']} offered" if s["offered_rps"] else ""))
+    print(f"  end-to-end   p50 {s['latency_p50_ms']:9.1f} ms   p99 {s['latency_p99_ms']:9.1f} ms")
+    print(f"  service      p50 {s['service_p50_ms']:9.1f} ms   p99 {s['service_p99_ms']:9.1f} ms")
+    print(f"  queue delay  p50 {s['queue_delay_p50_ms']:9.1f} ms   p99 {s['queue_delay_p99_ms']:9.1f} ms"
+          f"   (LLM scheduler p95 {s['llm_queue_wait_p95_ms']:.1f} ms)")
+    print(f"  RSS {s['rss_start_mib']} -> peak {s['rss_peak_mib']} MiB (+{s['rss_growth_mib']} at end), "
+          f"peak threads {s['peak_threads']}, peak in flight {s['peak_in_flight']}, peak waiting {s['peak_waiting']}")
+
+
+def saturation_point(levels: list):
+    """Last level before latency collapses: p99 within 2x the lowest level's and no extra errors."""
+    best, floor = None, None
+    for report in levels:
+        s = report["summary"]
+        floor = floor or s["latency_p99_ms"]
+        allowed_errors = 2 * report["settings"]["error_rate"] + 0.01
+        if s["latency_p99_ms"] > 2 * floor or s["error_rate"] > allowed_errors:
+            break
+        best = report
+    return best
+
+
+def sweep(args, levels: list) -> dict:
+    reports = []
+    flag = "--rate" if args.rate else "--concurrency"
+    passthrough = [a for a in sys.argv[1:] if a not in ("--json",)]
+    print(f"{'level':>16}  {'runs/s':>7}  {'p50 ms':>8}  {'p99 ms':>9}  {'queue p99':>9}  {'LLM wait p95':>12}  "
+          f"{'errors':>6}  {'threads':>7}  {'RSS +MiB':>8}")
+    for level in levels:
+        child = _strip_options(passthrough, ("--sweep", "--output", "--compare", flag)) + [flag, level, "--json"]
+        out = subprocess.run([sys.executable, __file__, *child], capture_output=True, text=True, check=True).stdout
+        report = json.loads(out.strip().splitlines()[-1])
+        s = report["summary"]
+        print(f"{level_label(report):>16}  {s['throughput_rps']:7.2f}  {s['latency_p50_ms']:8.1f}  "
+              f"{s['latency_p99_ms']:9.1f}  {s['queue_delay_p99_ms']:9.1f}  {s['llm_queue_wait_p95_ms']:12.1f}  "
+              f"{s['error_rate']:6.1%}  {s['peak_threads']:7}  {s['rss_growth_mib']:8.1f}")
+        reports.append(report)
+    best = saturation_point(reports)
+    print(f"Keeps up to {level_label(best)}" if best else "Saturated at the lowest level")
+    return {"commit": git_commit(), "sweep": reports,
+            "sustained": (best["settings"]["rate"] or best["settings"]["concurrency"]) if best else None}
+
+
+def _strip_options(argv: list, names: tuple) -> list:
+    """argv without the given options and their values."""
+    out, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in names:
+            skip = True
+        elif not arg.startswith(tuple(f"{n}=" for n in names)):
+            out.append(arg)
+    return out
+
+
+def compare(report: dict, baseline: dict):
+    old, new = baseline["summary"], report["summary"]
+    print(f"Against {baseline.get('commit') or 'baseline'}:")
+    for metric, lower_is_better in COMPARED.items():
+        if old.get(metric) is None or new.get(metric) is None:
+            continue
+        delta = new[metric] - old[metric]
+        worse = delta > 0 if lower_is_better else delta < 0
+        change = f"{delta / old[metric]:+.0%}" if old[metric] else f"{delta:+g}"
+        print(f"  {metric:<22} {old[metric]:>10} -> {new[metric]:<10} {change:>6}{'  worse' if worse and delta else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument("--rate", type=float, help="Open loop: Poisson arrivals per second")
+    load.add_argument("--concurrency", type=int, help="Closed loop: runs kept in flight")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to generate load for")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--workers", type=int, default=256,
+                        help="Open loop: most runs executing at once (threads in the pool, or async slots)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per fake model call")
+    parser.add_argument("--straggler-rate", type=float, default=0.0, help="Fraction of calls that are slow")
+    parser.add_argument("--straggler-latency", type=float, default=2.0, help="Seconds per slow call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with a 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls failing with a 429")
+    parser.add_argument("--llm-concurrency", type=int,
+                        help="Override LLM_MAX_CONCURRENCY, the process-wide cap on model calls in flight")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between timeline samples")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the arrival times")
+    parser.add_argument("--sweep", help="Comma-separated rates (or concurrencies) to run, each in a fresh process")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Print the change against an earlier report")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.llm_concurrency:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    if args.sweep:
+        report = sweep(args, [level.strip() for level in args.sweep.split(",") if level.strip()])
+    else:
+        report = run_level(args)
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_summary(report)
+            if args.compare:
+                with open(args.compare, encoding="utf-8") as f:
+                    compare(report, json.load(f))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Latency and cost per run: one pro model for every node vs per-node generation profiles.
+
+Registers a "fake" backend whose models answer with the canned responses from fake_llm.py
+after a per-model latency, and prices calls at the models' list prices from the tokens
+in the real prompts. "single" runs every node on gemini-2.5-pro; "tiered" moves the
+generator and manager to flash and the personas to flash-lite, keeping the finalizer on pro.
+"tiered+limit" also caps the finalizer's output tokens below the card's length to show the
+truncation retry. Latencies are simulated, so compare the modes rather than the absolutes.
+
+Usage:
+    python benchmarks/bench_profiles.py --runs 10
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ.update(LLM_CACHE_ENABLED="false", CHECKPOINT_ENABLED="false")
+
+# Seconds per call, roughly proportional to the models' observed latencies
+LATENCY = {"gemini-2.5-pro": 0.30, "gemini-2.5-flash": 0.10, "gemini-2.5-flash-lite": 0.05}
+
+MODES = {
+    "single": {},
+    "tiered": {
+        "generate_hook": "fake:gemini-2.5-flash",
+        "verify_personas": "fake:gemini-2.5-flash-lite",
+        "manager_evaluation": "fake:gemini-2.5-flash",
+    },
+}
+
+
+def measure(chain, runs: int) -> dict:
+    from metrics import REGISTRY
+
+    chain._models.clear()
+    REGISTRY.reset()
+    results = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(runs):
+            results.append(chain.run_workflow(f"Sample recipe #{i}: one-pan garlic butter pasta"))
+    elapsed = time.perf_counter() - start
+    truncated = sum(c["value"] for c in REGISTRY.snapshot()["counters"] if c["name"] == "llm_truncated_total")
+    return {
+        "seconds_per_run": elapsed / runs,
+        "cost_per_run": sum(r["metrics"]["cost_usd"] for r in results) / runs,
+        "calls_per_run": sum(r["metrics"]["llm_calls"] for r in results) / runs,
+        "truncation_retries": truncated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    import instagram_hook_chain as chain
+    from benchmarks.fake_llm import FakeChatModel
+    from config import Config
+    from llm_profiles import register_backend
+
+    register_backend("fake", lambda profile: FakeChatModel(
+        latency=LATENCY.get(profile.model, 0.3), model=profile.model, max_output_tokens=profile.max_output_tokens
+    ))
+    # Persona calls run concurrently; turn the manager fast path off so every run calls the manager
+    Config.LLM_MODEL = "fake:gemini-2.5-pro"
+    Config.MANAGER_FAST_PATH = False
+
+    rows = []
+    for mode, node_models in [*MODES.items(), ("tiered+limit", MODES["tiered"])]:
+        Config.LLM_NODE_MODELS = dict(node_models)
+        Config.LLM_NODE_MAX_TOKENS = {"finalize_hook": 16} if mode == "tiered+limit" else {}
+        rows.append((mode, measure(chain, args.runs)))
+
+    base = rows[0][1]
+    print(f"{'mode':>13}  {'s/run':>7}  {'USD/run':>9}  {'calls':>5}  {'trunc. retries':>14}")
+    for mode, r in rows:
+        print(f"{mode:>13}  {r['seconds_per_run']:7.3f}  {r['cost_per_run']:9.6f}  {r['calls_per_run']:5.1f}  "
+              f"{r['truncation_retries']:14g}   ({r['seconds_per_run'] / base['seconds_per_run']:.0%} latency, "
+              f"{r['cost_per_run'] / base['cost_per_run']:.0%} cost of single)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+End-to-end latency with and without speculative finalization.
+
+Personas rate every hook 7/10, so the manager fast path leaves the decision to the manager
+LLM and the hook qualifies for speculation. The manager approves `--approval-rate` of the
+hooks it sees (a fixed, seeded sequence, identical for both modes). Every model call takes
+`--latency` seconds. With speculation on, an approved run should save about one call's
+latency, and each rejection costs one wasted finalizer call.
+
+Usage:
+    python benchmarks/bench_speculation.py --runs 20 --latency 0.2 --approval-rate 0.8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ.update(LLM_CACHE_ENABLED="false", CHECKPOINT_ENABLED="false", RESULTS_STORE_PATH="")
+
+APPROVED = "APPROVED: Strong pattern interrupt with clear value."
+REJECTED = "REJECTED: Decent, but the payoff comes too late. Lead with the mistake."
+
+
+def measure(chain, mode: str, engine: str, runs: int, latency: float, approval_rate: float) -> dict:
+    from benchmarks.fake_llm import DEFAULT_RESPONSES, FakeChatModel
+    from config import Config
+    from metrics import percentile
+
+    rng = random.Random(0)
+    verdicts = [APPROVED if rng.random() < approval_rate else REJECTED for _ in range(runs * 3)]
+    chain.llm = model = FakeChatModel(latency=latency, responses={
+        **DEFAULT_RESPONSES,
+        "PERSONA SIMULATION": "Looks good, I might try it.\nSCORES: scroll_stop=7 share=7",
+        "MANAGER AGENT": verdicts,
+    })
+    Config.SPECULATIVE_FINALIZE = mode == "speculative"
+    before = chain.get_speculation_stats()
+
+    wall = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(runs):
+            start = time.perf_counter()
+            recipe = f"Sample recipe #{i}: one-pan garlic butter pasta"
+            if engine == "sync":
+                chain.run_workflow(recipe)
+            else:
+                asyncio.run(chain.arun_workflow(recipe))
+            wall.append(time.perf_counter() - start)
+
+    after = chain.get_speculation_stats()
+    hits, misses = after["hit"] - before["hit"], after["miss"] - before["miss"]
+    return {
+        "p50": percentile(wall, 50),
+        "mean": sum(wall) / runs,
+        # Counted when calls start at the model: cancelled and discarded drafts never reach the run's metrics
+        "calls_per_run": model.calls / runs,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "wasted": misses + after["error"] - before["error"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake model call")
+    parser.add_argument("--approval-rate", type=float, default=0.8, help="fraction of manager verdicts that approve")
+    args = parser.parse_args()
+
+    import instagram_hook_chain as chain
+
+    for engine in ("sync", "async"):
+        rows = [(mode, measure(chain, mode, engine, args.runs, args.latency, args.approval_rate))
+                for mode in ("serial", "speculative")]
+        base = rows[0][1]
+        for mode, r in rows:
+            print(f"{engine:>5} {mode:>11}: p50 {r['p50'] * 1000:7.1f} ms, mean {r['mean'] * 1000:7.1f} ms "
+                  f"({r['mean'] / base['mean']:.0%} of serial), {r['calls_per_run']:.2f} calls/run, "
+                  f"hit rate {r['hit_rate']:.0%}, {r['wasted']} wasted calls")
+
+
+if __name__ == "__main__":
+    main()
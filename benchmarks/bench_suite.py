@@ -0,0 +1,197 @@
+"""
+Offline benchmark suite: the full chain over a fixed recipe corpus, replayed from a cassette.
+
+Every model call is answered by the replay backend from benchmarks/cassettes/corpus.jsonl,
+so the suite needs no network or API key and every run asks the same questions. It reports
+per-node and end-to-end p50/p95, LLM calls per approved hook, and orchestration overhead
+(wall time per run with instant responses, i.e. everything except the model). With a
+baseline it fails when a metric regresses beyond the tolerance, so graph changes can be gated.
+
+Settings that change which prompts the graph sends (candidates, persona mode, fast path) are
+pinned below; re-record the cassette after changing prompts or those settings.
+
+Usage:
+    python benchmarks/bench_suite.py                               # replay, instant responses
+    python benchmarks/bench_suite.py --latency lognormal:0.8,0.5   # simulated model latency
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --tolerance 0.25
+    python benchmarks/bench_suite.py --record                      # re-record against the configured model
+    python benchmarks/bench_suite.py --record --fake               # record against the offline fake model
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+CORPUS = os.path.join(HERE, "corpus.jsonl")
+CASSETTE = os.path.join(HERE, "cassettes", "corpus.jsonl")
+
+PINNED_SETTINGS = {
+    "HOOK_CANDIDATES": "1",
+    "PERSONA_MODE": "separate",
+    "MANAGER_FAST_PATH": "true",
+    "LLM_CACHE_ENABLED": "false",
+    "CHECKPOINT_ENABLED": "false",
+    "RESULTS_STORE_PATH": "",
+    "LLM_NODE_MODELS": "",
+    "LLM_HEDGE_ENABLED": "false",
+}
+
+# Lower is better for every gated metric
+GATED_METRICS = ("overhead_ms_per_run", "e2e_p95_ms", "calls_per_approved_hook")
+
+# Played back in order by the fake model when recording offline: the first recipe's opening
+# hook breaks the rules and its first manager verdict is a rejection, so the corpus covers
+# the retry paths as well as first-try approvals
+FAKE_RESPONSES = {
+    "HOOK GENERATOR": [
+        "Hi guys, today we're making the easiest recipe you will ever see",
+        "Garlic first is killing your pasta",
+        "You have been cooking this wrong all along",
+    ],
+    "MANAGER AGENT": [
+        "REJECTED: Generic curiosity hook; the personas would scroll past. Lead with the mistake.",
+        "APPROVED: Strong pattern interrupt with clear value, personas would stop and share.",
+    ],
+}
+
+
+def load_corpus() -> list:
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record(fake: bool):
+    import instagram_hook_chain as chain
+
+    if fake:
+        from benchmarks.fake_llm import DEFAULT_RESPONSES, FakeChatModel
+        chain.llm = FakeChatModel(responses={**DEFAULT_RESPONSES, **FAKE_RESPONSES})
+    corpus = load_corpus()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in corpus:
+            chain.run_workflow(item["recipe_description"])
+    print(f"Recorded {len(corpus)} recipes to {CASSETTE}")
+
+
+def run_corpus(chain, corpus: list, repeat: int) -> dict:
+    from metrics import REGISTRY, percentile
+
+    REGISTRY.reset()
+    chain._models.clear()
+    wall, calls, approved = [], 0, 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for item in corpus:
+                start = time.perf_counter()
+                result = chain.run_workflow(item["recipe_description"])
+                wall.append(time.perf_counter() - start)
+                calls += result["metrics"]["llm_calls"]
+                approved += int(result["is_approved"])
+
+    nodes = {}
+    for series, stats in REGISTRY.snapshot()["latency"].items():
+        kind, node = series.split(":", 1)
+        if kind == "node":
+            nodes[node] = {"p50_ms": round(stats["p50"] * 1000, 2), "p95_ms": round(stats["p95"] * 1000, 2)}
+    return {
+        "runs": len(wall),
+        "approved": approved,
+        "e2e_p50_ms": round(percentile(wall, 50) * 1000, 2),
+        "e2e_p95_ms": round(percentile(wall, 95) * 1000, 2),
+        "mean_ms_per_run": round(sum(wall) / len(wall) * 1000, 2),
+        "calls_per_approved_hook": round(calls / approved, 3) if approved else None,
+        "nodes": nodes,
+    }
+
+
+def replay(latency: str, repeat: int) -> dict:
+    import instagram_hook_chain as chain
+    from config import Config
+
+    corpus = load_corpus()
+    Config.LLM_REPLAY_LATENCY = "none"
+    # Warm up: compile the graph, load prompts and the cassette
+    run_corpus(chain, corpus[:1], 1)
+    instant = run_corpus(chain, corpus, repeat)
+    report = dict(instant, overhead_ms_per_run=instant["mean_ms_per_run"], latency="none")
+    if latency != "none":
+        Config.LLM_REPLAY_LATENCY = latency
+        timed = run_corpus(chain, corpus, repeat)
+        report.update(timed, overhead_ms_per_run=instant["mean_ms_per_run"], latency=latency)
+    return report
+
+
+def print_report(report: dict):
+    print(f"{report['runs']} runs ({report['approved']} approved), replay latency: {report['latency']}")
+    print(f"  end-to-end         p50 {report['e2e_p50_ms']:9.2f} ms   p95 {report['e2e_p95_ms']:9.2f} ms")
+    for node, stats in sorted(report["nodes"].items()):
+        print(f"  {node:<18} p50 {stats['p50_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms")
+    print(f"  LLM calls per approved hook: {report['calls_per_approved_hook']}")
+    print(f"  orchestration overhead: {report['overhead_ms_per_run']:.2f} ms per run")
+
+
+def check_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Gated metrics that got worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for metric in GATED_METRICS:
+        old, new = baseline.get(metric), report.get(metric)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + tolerance):
+            regressions.append(f"{metric}: {old} -> {new} (+{(new / old - 1) if old else float('inf'):.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", action="store_true", help="Re-record the cassette instead of replaying it")
+    parser.add_argument("--fake", action="store_true", help="With --record: record the offline fake model")
+    parser.add_argument("--latency", default="none",
+                        help="Replay latency: none, recorded, fixed:<s> or lognormal:<median>,<sigma>")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare against this saved report and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+
+    os.environ.update(PINNED_SETTINGS)
+    if args.record:
+        if os.path.exists(CASSETTE):
+            os.remove(CASSETTE)
+        os.environ["LLM_RECORD_PATH"] = CASSETTE
+        if args.fake:
+            os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+        record(args.fake)
+        return 0
+
+    os.environ.update(LLM_MODEL=f"replay:{CASSETTE}", GEMINI_API_KEY="offline-benchmark")
+    report = replay(args.latency, max(1, args.repeat))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = check_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
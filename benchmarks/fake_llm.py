@@ -0,0 +1,157 @@
+"""
+Offline stand-in for the Gemini chat model used by the benchmarks.
+Answers each agent prompt with a canned response so the graph can run without a network.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+# Canned answers keyed by a marker that appears in the matching prompt file
+DEFAULT_RESPONSES = {
+    "HOOK GENERATOR": "Garlic first is killing your pasta",
+    "PERSONA SIMULATION": "Arre waah, I need to try this tonight. Sending it to my roommate right now.\n"
+                          "SCORES: scroll_stop=8 share=7",
+    "MANAGER AGENT": "APPROVED: Strong pattern interrupt with clear value, personas would stop and share.",
+    "FINALIZER AGENT": "**🎬 YOUR WINNING HOOK — PRODUCTION CARD**\n\n**HOOK TEXT (on screen):**\nGarlic first is KILLING your pasta",
+}
+
+_in_flight_lock = threading.Lock()
+
+
+class FakeRateLimitError(Exception):
+    """Simulated Gemini quota error (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    
+    code = 429
+
+
+class FakeServerError(Exception):
+    """Simulated transient Gemini failure (HTTP 503); not retried by the scheduler."""
+    
+    code = 503
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that sleeps for `latency` seconds and returns a canned answer per agent.
+    
+    A response may also be a list, which is played back in order (the last item repeats).
+    Quota errors can be simulated: the first `rate_limit_first` calls raise FakeRateLimitError,
+    and so does any call made while `max_in_flight` calls are already running (0 = no limit).
+    Random failures can be injected too: an `error_rate` fraction of calls raise FakeServerError
+    and a `rate_limit_rate` fraction raise FakeRateLimitError.
+    A `straggler_rate` fraction of calls take `straggler_latency` seconds instead of `latency`,
+    and a call longer than the request's `timeout` raises TimeoutError after that timeout.
+    With `seed` set, the random draws come from a seeded generator, taken in call order, so a
+    benchmark sees the same sequence of stragglers and errors on every run.
+    Usage is reported at ~4 characters per token; with `max_output_tokens` set, longer answers
+    are cut off and marked with finish_reason MAX_TOKENS, like Gemini does.
+    """
+    
+    latency: float = 0.0
+    responses: dict = DEFAULT_RESPONSES
+    calls: int = 0
+    calls_by_marker: dict = {}
+    rate_limit_first: int = 0
+    max_in_flight: int = 0
+    in_flight: int = 0
+    rate_limited: int = 0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    errors: int = 0
+    straggler_rate: float = 0.0
+    straggler_latency: float = 0.0
+    model: str = "fake-gemini"
+    max_output_tokens: int = 0
+    seed: Optional[int] = None
+    rng: Any = None
+    
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.rng = random.Random(self.seed) if self.seed is not None else random
+    
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+    
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        prompt = messages[-1].content if messages else ""
+        for marker, answer in self.responses.items():
+            if marker in prompt:
+                if isinstance(answer, list):
+                    index = self.calls_by_marker.get(marker, 0)
+                    self.calls_by_marker[marker] = index + 1
+                    return answer[min(index, len(answer) - 1)]
+                return answer
+        return ""
+    
+    def _start_call(self, kwargs: dict) -> tuple:
+        """Count the call, raise simulated 429s, and return (seconds to wait, timeout error or None)."""
+        with _in_flight_lock:
+            self.calls += 1
+            over_quota = self.max_in_flight and self.in_flight >= self.max_in_flight
+            unlucky = self.rate_limit_rate and self.rng.random() < self.rate_limit_rate
+            if self.calls <= self.rate_limit_first or over_quota or unlucky:
+                self.rate_limited += 1
+                raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: simulated quota exceeded")
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors += 1
+                raise FakeServerError("503 UNAVAILABLE: simulated server error")
+            self.in_flight += 1
+            straggler = self.straggler_rate and self.rng.random() < self.straggler_rate
+        latency = self.straggler_latency if straggler else self.latency
+        timeout = kwargs.get("timeout")
+        if timeout is not None and latency > timeout:
+            return timeout, TimeoutError(f"Deadline of {timeout}s exceeded")
+        return latency, None
+    
+    def _end_call(self):
+        with _in_flight_lock:
+            self.in_flight -= 1
+    
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = messages[-1].content if messages else ""
+        answer = self._respond(messages)
+        finish_reason = "STOP"
+        if self.max_output_tokens and len(answer) // 4 > self.max_output_tokens:
+            answer, finish_reason = answer[:self.max_output_tokens * 4], "MAX_TOKENS"
+        input_tokens, output_tokens = len(prompt) // 4, len(answer) // 4
+        message = AIMessage(
+            content=answer,
+            response_metadata={"finish_reason": finish_reason, "model_name": self.model},
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        latency, error = self._start_call(kwargs)
+        try:
+            if latency:
+                time.sleep(latency)
+            if error is not None:
+                raise error
+        finally:
+            self._end_call()
+        return self._result(messages)
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        # Waits on the event loop, like a real async HTTP client, instead of parking a thread
+        latency, error = self._start_call(kwargs)
+        try:
+            if latency:
+                await asyncio.sleep(latency)
+            if error is not None:
+                raise error
+        finally:
+            self._end_call()
+        return self._result(messages)
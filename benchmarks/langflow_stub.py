@@ -0,0 +1,119 @@
+"""
+Local stub of the Langflow run endpoint for offline client tests and benchmarks.
+Answers POSTs with a Langflow-shaped response after a configurable delay, and can fail the
+first N requests with a given status code to exercise retries. With ?stream=true the content
+is sent as newline-delimited token events spread evenly over the same delay.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOOKS_CONTENT = (
+    "1. Garlic first is killing your pasta\n"
+    "2. You're wasting the best part of chicken\n"
+    "3. Why MSG makes everything taste better\n"
+    "4. 5-minute brownies — just a mug\n"
+    "5. If you've eaten cereal for dinner\n"
+)
+
+
+def langflow_response(content: str = HOOKS_CONTENT) -> dict:
+    """The nested response shape the Langflow run endpoint returns."""
+    return {"outputs": [{"outputs": [{"results": {"message": {"content": content}}}]}]}
+
+
+class StubLangflowServer:
+    """
+    Threaded HTTP server on localhost; use as a context manager.
+    
+    Attributes:
+        url: Base URL of the run endpoint
+        requests: Number of requests received
+        connections: Number of TCP connections accepted (shows keep-alive reuse)
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, fail_status: int = 503):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            # Headers and body are written separately; without TCP_NODELAY, Nagle + delayed ACK
+            # add ~40 ms to every response on a reused connection
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _write_chunk(self, event: dict):
+                data = (json.dumps(event) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _stream_tokens(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunks = [HOOKS_CONTENT[i:i + 8] for i in range(0, len(HOOKS_CONTENT), 8)]
+                try:
+                    for chunk in chunks:
+                        time.sleep(stub.latency / len(chunks))
+                        self._write_chunk({"event": "token", "data": {"chunk": chunk}})
+                    self._write_chunk({"event": "end", "data": {"result": langflow_response()}})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading early (e.g. it only wanted the first hook)
+                    self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.requests += 1
+                    should_fail = stub.requests <= stub.fail_first
+                if "stream=true" in self.path and not should_fail:
+                    self._stream_tokens()
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if should_fail:
+                    self._send_json(stub.fail_status, {"detail": "stub failure"}, {"Retry-After": "0"})
+                else:
+                    self._send_json(200, langflow_response())
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}/api/v1/run"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,75 @@
+"""
+SQLite checkpointer shared by the sync and async workflow runs.
+LangGraph's SqliteSaver only implements the sync interface and AsyncSqliteSaver binds its
+connection to one event loop. This saver keeps the single thread-safe connection and
+serves the async methods by running the sync ones in a worker thread.
+Finished runs delete their checkpoints, so whatever is left belongs to failed runs; those
+older than CHECKPOINT_TTL_SECONDS are pruned when the database is opened.
+"""
+
+import asyncio
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Custom types stored in graph state, allowed when checkpoints are deserialized
+STATE_TYPES = [("run_records", "HistoryEntry")]
+
+
+class SqliteCheckpointer(SqliteSaver):
+    """SqliteSaver usable from both invoke() and ainvoke()."""
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter: Optional[dict] = None, before=None,
+                    limit: Optional[int] = None) -> AsyncIterator[Any]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes: Sequence[tuple], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete runs whose last checkpoint is older than `max_age_seconds`; returns how many."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+        with self.cursor(transaction=False) as cur:
+            thread_ids = [row[0] for row in cur.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        pruned = 0
+        for thread_id in thread_ids:
+            saved = self.get_tuple({"configurable": {"thread_id": thread_id}})
+            if saved is None or datetime.fromisoformat(saved.checkpoint["ts"]) < cutoff:
+                self.delete_thread(thread_id)
+                pruned += 1
+        return pruned
+
+
+def open_checkpointer(path: str, max_age_seconds: float = 0) -> SqliteCheckpointer:
+    """
+    Open (creating if needed) the checkpoint database at `path`.
+
+    With `max_age_seconds` set, unfinished runs last saved longer ago than that are deleted,
+    so runs nobody resumes (e.g. failed runs under a generated ID) don't pile up.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # One connection shared by all runs; SqliteSaver serializes access with its own lock
+    conn = sqlite3.connect(path, check_same_thread=False)
+    checkpointer = SqliteCheckpointer(conn, serde=JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES))
+    if max_age_seconds > 0:
+        pruned = checkpointer.prune(max_age_seconds)
+        if pruned:
+            print(f"Pruned {pruned} unfinished run(s) older than {max_age_seconds:g}s from {path}")
+    return checkpointer
@@ -10,6 +10,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _node_settings(name: str, cast=float) -> dict:
+    """Parse a "node=value,node=value" environment variable into a dict."""
+    settings = {}
+    for pair in os.getenv(name, "").split(","):
+        if "=" in pair:
+            node, value = pair.split("=", 1)
+            settings[node.strip()] = cast(value.strip())
+    return settings
+
+
 class Config:
     """Configuration class for Gemini API settings."""
     
@@ -20,6 +30,133 @@ class Config:
     # Request timeout in seconds
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "60"))
     
+    # Langflow API (used by langflow_client.LangflowClient)
+    LANGFLOW_API_URL = os.getenv("LANGFLOW_API_URL", "http://localhost:7860/api/v1/run")
+    LANGFLOW_API_KEY = os.getenv("LANGFLOW_API_KEY", "")
+    LANGFLOW_FLOW_ID = os.getenv("LANGFLOW_FLOW_ID", "")
+    # Keep-alive connections kept per host, and how many descriptions generate_hooks_many sends at once
+    LANGFLOW_POOL_SIZE = int(os.getenv("LANGFLOW_POOL_SIZE", "10"))
+    LANGFLOW_MAX_CONCURRENCY = int(os.getenv("LANGFLOW_MAX_CONCURRENCY", "8"))
+    # Retries on 429/5xx and connection errors, with exponential backoff + jitter starting at BACKOFF seconds
+    LANGFLOW_MAX_RETRIES = int(os.getenv("LANGFLOW_MAX_RETRIES", "3"))
+    LANGFLOW_BACKOFF_SECONDS = float(os.getenv("LANGFLOW_BACKOFF_SECONDS", "0.5"))
+    
+    # Hooks requested per generator call; >1 filters them locally and scores survivors in one batched persona pass
+    HOOK_CANDIDATES = int(os.getenv("HOOK_CANDIDATES", "1"))
+    
+    # "separate" = one request per persona, "combined" = all personas in one structured-output request
+    # (falls back to separate requests if the combined answer can't be parsed)
+    PERSONA_MODE = os.getenv("PERSONA_MODE", "separate").lower()
+    
+    # Iterations per run, and an optional per-run budget (0 = unlimited): a run stops early, finalizing
+    # its best-rated hook, once the budget can't cover another full iteration plus the finalizer
+    MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", "3"))
+    RUN_MAX_LLM_CALLS = int(os.getenv("RUN_MAX_LLM_CALLS", "0"))
+    RUN_MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "0"))
+    RUN_MAX_SECONDS = float(os.getenv("RUN_MAX_SECONDS", "0"))
+    
+    # Manager fast path: decide locally from persona scores (0-10, mean of scroll-stop and share)
+    # when every persona scores >= APPROVE or the average is <= REJECT; only borderline hooks use the LLM
+    MANAGER_FAST_PATH = os.getenv("MANAGER_FAST_PATH", "true").lower() == "true"
+    MANAGER_FAST_APPROVE_SCORE = float(os.getenv("MANAGER_FAST_APPROVE_SCORE", "8"))
+    MANAGER_FAST_REJECT_SCORE = float(os.getenv("MANAGER_FAST_REJECT_SCORE", "4"))
+    
+    # Speculative finalization: when the manager LLM has to decide and every persona rated the hook at
+    # least SCORE, draft the production card alongside the manager call (dropped if the hook is rejected)
+    SPECULATIVE_FINALIZE = os.getenv("SPECULATIVE_FINALIZE", "false").lower() == "true"
+    SPECULATIVE_FINALIZE_SCORE = float(os.getenv("SPECULATIVE_FINALIZE_SCORE", "6"))
+    
+    # Maximum number of persona verifiers run at the same time (1 = sequential)
+    PERSONA_MAX_CONCURRENCY = int(os.getenv("PERSONA_MAX_CONCURRENCY", "3"))
+    
+    # Generation profile per graph node: model ("gemini-2.5-flash", or "backend:model" such as
+    # "openai:llama3.1:8b" for an OpenAI-compatible server), temperature and output token limit.
+    # Node overrides look like LLM_NODE_MODELS="verify_personas=gemini-2.5-flash"
+    LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-pro")
+    LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "8000"))
+    LLM_NODE_MODELS = _node_settings("LLM_NODE_MODELS", str)
+    LLM_NODE_TEMPERATURES = _node_settings("LLM_NODE_TEMPERATURES", float)
+    LLM_NODE_MAX_TOKENS = _node_settings("LLM_NODE_MAX_TOKENS", int)
+    # Answers cut off at the token limit are retried this many times with double the limit
+    LLM_TRUNCATION_RETRIES = int(os.getenv("LLM_TRUNCATION_RETRIES", "1"))
+    # OpenAI-compatible backend (e.g. a local vLLM/Ollama server at http://localhost:11434/v1)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+    # USD per million input:output tokens for cost reporting, e.g. LLM_PRICES="my-model=0.2:0.8"
+    # (Gemini 2.5 list prices are built in)
+    LLM_PRICES = _node_settings("LLM_PRICES", lambda v: tuple(float(p) for p in v.split(":")))
+    
+    # Record every model response to this cassette (JSON lines), and the simulated latency of
+    # the replay backend (LLM_MODEL=replay:<cassette>): none, recorded, fixed:<s> or lognormal:<median>,<sigma>
+    LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "")
+    LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "none")
+    
+    # Process-wide LLM scheduler shared by every session: requests/tokens per minute (0 = no limit),
+    # maximum calls in flight (halved on 429 quota errors, then ramped back up) and 429 retries
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "5"))
+    LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1.0"))
+    
+    # Per-node budgets for model calls: seconds per request (default REQUEST_TIMEOUT) and retries
+    # after timeouts/5xx errors, e.g. LLM_NODE_TIMEOUTS="verify_personas=15,manager_evaluation=20"
+    LLM_NODE_TIMEOUTS = _node_settings("LLM_NODE_TIMEOUTS", float)
+    LLM_RETRIES = int(os.getenv("LLM_RETRIES", "1"))
+    LLM_NODE_RETRIES = _node_settings("LLM_NODE_RETRIES", int)
+    
+    # Hedged requests: for these nodes, send a duplicate when the first request hasn't answered by the
+    # node's observed latency quantile; duplicates are capped at MAX_FRACTION of those nodes' calls.
+    # The quantile must fire well below the cap (p95 fires on ~5% of calls) or ordinary slightly-slow
+    # calls use up the budget before real stragglers arrive
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_NODES = [n.strip() for n in os.getenv("LLM_HEDGE_NODES", "verify_personas,manager_evaluation").split(",") if n.strip()]
+    LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "95"))
+    LLM_HEDGE_MAX_FRACTION = float(os.getenv("LLM_HEDGE_MAX_FRACTION", "0.1"))
+    
+    # Persistent LLM response cache (SQLite)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    # 0 = entries never expire
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "0"))
+    # Comma-separated graph nodes that always call the model. The generator samples at a non-zero
+    # temperature and its prompt can repeat between iterations, so a cached answer would hand back
+    # the hook that was just rejected
+    LLM_CACHE_BYPASS_NODES = [n.strip() for n in os.getenv("LLM_CACHE_BYPASS_NODES", "generate_hook").split(",") if n.strip()]
+    
+    # Metrics: rolling window of latency samples per node for p50/p95, and an optional
+    # JSON-lines file every span (node run or LLM call) is appended to
+    METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "5000"))
+    METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "")
+    
+    # Save run state after every graph node (SQLite) so a failed run continues where it stopped
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(".cache", "checkpoints.sqlite3"))
+    # Unfinished runs last saved longer ago than this are deleted when the checkpointer opens (0 = keep)
+    CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", "86400"))
+
+    # SQLite file every finished run is written to for later analysis (empty = don't keep runs)
+    RESULTS_STORE_PATH = os.getenv("RESULTS_STORE_PATH", "")
+    
+    # Background workflow runs for the Streamlit app, shared by all sessions (size it to the Gemini quota),
+    # and how long a finished job's result is kept for its session to pick up
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+
+    # Headless HTTP service (http_server.py)
+    HTTP_HOST = os.getenv("HTTP_HOST", "127.0.0.1")
+    HTTP_PORT = int(os.getenv("HTTP_PORT", "8080"))
+    HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "4"))
+    HTTP_MAX_QUEUE = int(os.getenv("HTTP_MAX_QUEUE", "32"))
+    
+    # Concurrent workflow runs for batch_cli.py
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+    
+    # Re-read prompt files from prompts/ when their mtime changes (handy while editing prompts)
+    PROMPT_HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "false").lower() == "true"
+    
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
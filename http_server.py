@@ -0,0 +1,271 @@
+"""
+Headless HTTP service for the hook chain.
+
+    POST /hooks         {"recipe_description": "..."} -> JSON with history and final_output
+    POST /hooks/stream  same body -> server-sent events: "node" per finished node, then "done"
+    GET  /metrics       Prometheus text from the metrics registry
+    GET  /healthz
+
+Runs execute on a bounded worker pool. Requests whose normalized description is already
+in flight are coalesced onto that run (single-flight) instead of starting their own.
+
+Usage:
+    python http_server.py --port 8080
+    python http_server.py --profile-startup     # cold-start report, then exit
+"""
+
+import argparse
+import json
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+
+from config import Config
+from run_records import json_default
+import metrics
+
+
+def normalize_description(description: str) -> str:
+    """Key for coalescing: case and whitespace differences don't make a different request."""
+    return re.sub(r"\s+", " ", description).strip().lower()
+
+
+class Flight:
+    """One in-flight workflow run and the progress events every waiting request receives."""
+
+    def __init__(self, description: str, run_id: str):
+        self.description = description
+        self.run_id = run_id
+        self.events: list = []
+        self.done = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._cond = threading.Condition()
+
+    def publish(self, event: Dict[str, Any]):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def finish(self, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self._cond:
+            self.result, self.error, self.done = result, error, True
+            self._cond.notify_all()
+
+    def wait(self) -> Dict[str, Any]:
+        """Block until the run has finished; raises RuntimeError if it failed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.result
+
+    def follow(self) -> Iterator[Dict[str, Any]]:
+        """Every progress event from the start of the run, then new ones as they arrive."""
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: index < len(self.events) or self.done)
+                pending, done = self.events[index:], self.done
+            index += len(pending)
+            yield from pending
+            if done and index >= len(self.events):
+                return
+
+
+class HookService:
+    """Bounded pool of workflow runs with single-flight coalescing of identical descriptions."""
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 32):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="hook-http")
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, description: str, run_id: Optional[str] = None) -> tuple:
+        """
+        Join the in-flight run for this description, or start one.
+
+        A new run checkpoints under `run_id`, or a generated ID when none is given, so a failed
+        run can be resumed by submitting its flight's run_id again.
+
+        Returns:
+            (flight, coalesced) - coalesced is True when an identical run was already in flight
+
+        Raises:
+            OverflowError: max_concurrency runs are busy and max_queue more are waiting
+        """
+        key = normalize_description(description)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                metrics.REGISTRY.inc("http_coalesced_total")
+                return flight, True
+            if len(self._flights) >= self.max_concurrency + self.max_queue:
+                raise OverflowError("Too many runs in flight")
+            flight = self._flights[key] = Flight(description, run_id or uuid.uuid4().hex)
+        self._executor.submit(self._run, key, flight)
+        return flight, False
+
+    def _run(self, key: str, flight: Flight):
+        from instagram_hook_chain import stream_workflow
+
+        result = None
+        try:
+            for event in stream_workflow(flight.description, run_id=flight.run_id):
+                if event["type"] == "node":
+                    flight.publish({"event": "node", "node": event["node"], "update": event["update"]})
+                elif event["type"] == "done":
+                    result = event["state"]
+            flight.finish(result=result)
+        except Exception as e:
+            flight.finish(error=f"{type(e).__name__}: {e}")
+        finally:
+            # Later requests for the same description start a new run
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+def result_body(result: Dict[str, Any], coalesced: bool) -> Dict[str, Any]:
+    """JSON response for a finished run."""
+    return {
+        "run_id": result.get("run_id"),
+        "hook": result.get("current_hook", ""),
+        "is_approved": result.get("is_approved", False),
+        "iterations": result.get("iterations", 0),
+        "history": [entry.to_dict() for entry in result.get("history", [])],
+        "final_output": result.get("final_output", ""),
+        "metrics": result.get("metrics", {}),
+        "coalesced": coalesced,
+    }
+
+
+def make_handler(service: HookService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            metrics.REGISTRY.inc("http_requests_total", path=self.path.split("?")[0], status=str(status))
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers: dict = None):
+            self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+        def _sse(self, event: str, data: Dict[str, Any]):
+            payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=json_default)}\n\n".encode("utf-8")
+            self.wfile.write(payload)
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send_json(200, {"status": "ok", "in_flight": service.in_flight()})
+            elif self.path == "/metrics":
+                self._send(200, metrics.REGISTRY.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            if path not in ("/hooks", "/hooks/stream"):
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                description = str(body.get("recipe_description", "")).strip()
+            except (ValueError, AttributeError):
+                self._send_json(400, {"error": "Body must be a JSON object"})
+                return
+            if len(description) < 10:
+                self._send_json(400, {"error": "recipe_description must be at least 10 characters"})
+                return
+
+            try:
+                flight, coalesced = service.submit(description, body.get("run_id"))
+            except OverflowError as e:
+                self._send_json(503, {"error": str(e)}, {"Retry-After": "5"})
+                return
+
+            if path == "/hooks":
+                try:
+                    result = flight.wait()
+                except RuntimeError as e:
+                    self._send_json(502, {"error": str(e), "run_id": flight.run_id})
+                    return
+                self._send_json(200, result_body(result, coalesced))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for event in flight.follow():
+                    self._sse(event["event"], {"node": event["node"], "update": event["update"]})
+                if flight.error is not None:
+                    self._sse("error", {"error": flight.error, "run_id": flight.run_id})
+                else:
+                    self._sse("done", result_body(flight.result, coalesced))
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away; the run continues for anyone else waiting on it
+                pass
+            metrics.REGISTRY.inc("http_requests_total", path=path, status="200")
+
+    return Handler
+
+
+def serve(host: str, port: int, service: Optional[HookService] = None) -> ThreadingHTTPServer:
+    """Create the server (call serve_forever() on it)."""
+    service = service or HookService(Config.HTTP_MAX_CONCURRENCY, Config.HTTP_MAX_QUEUE)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the viral hook chain over HTTP.")
+    parser.add_argument("--host", default=Config.HTTP_HOST)
+    parser.add_argument("--port", type=int, default=Config.HTTP_PORT)
+    parser.add_argument("--profile-startup", nargs="?", const="text", choices=["text", "json"],
+                        help="Report cold-start time per phase and the slowest imports, then exit")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        import startup_profile
+        startup_profile.main(args.profile_startup)
+        return
+
+    Config.validate()
+    server = serve(args.host, args.port)
+    print(f"Serving hook chain on http://{args.host}:{args.port} "
+          f"({Config.HTTP_MAX_CONCURRENCY} concurrent runs, {Config.HTTP_MAX_QUEUE} queued)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
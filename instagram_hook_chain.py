@@ -3,28 +3,290 @@ Instagram Food Reel Hook Generator - LangGraph Implementation
 A multi-agent architecture to generate, test via personas, and manage viral hooks.
 """
 
-from typing import Dict, Any, List, TypedDict, Literal
+from typing import TYPE_CHECKING, Annotated, Dict, Any, Iterator, List, Optional, TypedDict, Literal
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import asyncio
+import contextvars
+import json
+import operator
 import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langgraph.graph import StateGraph, END
-
-# Load environment variables
-load_dotenv()
-
-# Initialize the LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-pro",
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=0.7,
-    max_output_tokens=8000
-)
+import re
+import threading
+import time
+import uuid
+from config import Config
+from iteration_policy import IterationPolicy
+from llm_cache import LLMCache, get_cache, is_cacheable
+from llm_hedging import acall_with_budget, call_with_budget
+from llm_profiles import GenerationProfile, call_cost, create_model, generation_profile, is_truncated
+from results_store import get_results_store
+from run_records import HistoryEntry, merge_update
+import metrics
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+# Chat models are created on first use, one per generation profile (see llm_profiles), so
+# importing this module is cheap and doesn't need GEMINI_API_KEY. Benchmarks and tests may
+# assign their own model to `llm`, which then serves every node.
+llm = None
+_models: Dict[GenerationProfile, Any] = {}
+_llm_lock = threading.Lock()
+
+def get_llm(node: Optional[str] = None, profile: Optional[GenerationProfile] = None):
+    """Return the chat model for `profile` (default: `node`'s generation profile), creating it on first use."""
+    if llm is not None:
+        return llm
+    profile = profile or generation_profile(node)
+    model = _models.get(profile)
+    if model is None:
+        with _llm_lock:
+            model = _models.get(profile)
+            if model is None:
+                model = _models[profile] = create_model(profile)
+    return model
+
+# Process-wide registry: prompt text, parsed templates and the compiled graph are built
+# once and reused by every run. With Config.PROMPT_HOT_RELOAD the prompt files' mtimes are
+# checked on each lookup so edits under prompts/ are picked up without a restart.
+_registry_lock = threading.RLock()
+_prompt_cache: Dict[str, tuple] = {}
+_template_cache: Dict[tuple, tuple] = {}
+_compiled_workflow = None
+
+def _prompt_path(filename: str) -> str:
+    return os.path.join(os.path.dirname(__file__), "prompts", filename)
 
 def load_prompt(filename: str) -> str:
-    path = os.path.join(os.path.dirname(__file__), "prompts", filename)
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    cached = _prompt_cache.get(filename)
+    if cached is not None and not Config.PROMPT_HOT_RELOAD:
+        return cached[1]
+    
+    path = _prompt_path(filename)
+    mtime = os.path.getmtime(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    with _registry_lock:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        _prompt_cache[filename] = (mtime, text)
+    return text
+
+def get_template(filename: str, suffix: str) -> "PromptTemplate":
+    """Return the cached PromptTemplate for a prompt file plus its input suffix."""
+    prompt_str = load_prompt(filename)
+    key = (filename, suffix)
+    cached = _template_cache.get(key)
+    # Rebuild only when the prompt text was hot-reloaded
+    if cached is not None and cached[0] == prompt_str:
+        return cached[1]
+    
+    # Deferred like the model client: langchain_core.prompts pulls in langsmith (~0.6s)
+    from langchain_core.prompts import PromptTemplate
+    with _registry_lock:
+        template = PromptTemplate.from_template(prompt_str + suffix)
+        _template_cache[key] = (prompt_str, template)
+    return template
+
+def _cached_response(node: str, prompt: str) -> tuple:
+    """
+    Look the prompt up in the persistent LLM cache.
+    
+    Returns:
+        (cache or None when the node isn't cacheable, cache key, cached content or None)
+    """
+    # While recording a cassette every prompt has to reach the model
+    cache = get_cache() if is_cacheable(node) and not Config.LLM_RECORD_PATH else None
+    if cache is None:
+        return None, None, None
+    model = get_llm(node)
+    key = LLMCache.make_key(
+        getattr(model, "model", type(model).__name__), getattr(model, "temperature", None), node, prompt
+    )
+    hit = cache.get(key, node)
+    return cache, key, hit["content"] if hit is not None else None
+
+def _call_options(prompt: str) -> Dict[str, Any]:
+    """Scheduler arguments for a model call made by the current run."""
+    return {
+        "priority": _run_priority(),
+        "estimated_tokens": len(prompt) // 4,
+        "usage": lambda r: (getattr(r, "usage_metadata", None) or {}).get("total_tokens", 0),
+    }
+
+def _record_response(node: str, prompt: str, start: float, res: Any, retries: int, cache, key: str,
+                     profile: GenerationProfile, cost: float) -> str:
+    """Record the call's LLM span, store the answer in the cache (and cassette) and return its text."""
+    usage = getattr(res, "usage_metadata", None) or {}
+    seconds = time.perf_counter() - start
+    if Config.LLM_RECORD_PATH:
+        from llm_cassettes import record_call
+        record_call(Config.LLM_RECORD_PATH, node, prompt, res, seconds)
+    metrics.record_llm_call(
+        node, seconds,
+        input_tokens=usage.get("input_tokens", 0), output_tokens=usage.get("output_tokens", 0),
+        retries=retries, model=profile.model, cost_usd=cost + _response_cost(profile, res)
+    )
+    
+    # A still-truncated answer is used, but not cached
+    if cache is not None and not is_truncated(res):
+        cache.set(key, node, res.content, getattr(res, "response_metadata", None))
+    return res.content
+
+def _response_cost(profile: GenerationProfile, res: Any) -> float:
+    usage = getattr(res, "usage_metadata", None) or {}
+    return call_cost(profile.model, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+def _larger_profile(node: str, profile: GenerationProfile, res: Any, attempt: int) -> Optional[GenerationProfile]:
+    """Profile with double the output limit when `res` was cut off and retries are left, else None."""
+    if not is_truncated(res) or attempt >= Config.LLM_TRUNCATION_RETRIES:
+        return None
+    metrics.REGISTRY.inc("llm_truncated_total", node=node)
+    larger = replace(profile, max_output_tokens=profile.max_output_tokens * 2)
+    print(f"Answer for {node} hit the {profile.max_output_tokens}-token limit, retrying with {larger.max_output_tokens}...")
+    return larger
+
+def call_llm(node: str, template: "PromptTemplate", inputs: Dict[str, Any], stream: bool = True) -> str:
+    """
+    Render a prompt and send it to the model on behalf of a graph node.
+    
+    Responses are served from the persistent LLM cache when the node is cacheable.
+    Model calls go through the process-wide scheduler (rate limits, priority, 429 backoff)
+    within the node's timeout/retry budget, hedged for the nodes in Config.LLM_HEDGE_NODES.
+    Every call (or cache hit) is recorded as an LLM span for metrics. With stream=False the
+    answer is not streamed to a streaming run's caller as tokens.
+    """
+    start = time.perf_counter()
+    prompt = template.format(**inputs)
+    
+    cache, key, hit = _cached_response(node, prompt)
+    if hit is not None:
+        metrics.record_llm_call(node, time.perf_counter() - start, cache_hit=True)
+        return hit
+    
+    writer = _token_writer() if stream else None
+    profile = generation_profile(node)
+    model = get_llm(node, profile)
+    
+    def attempt(timeout: float, cancelled: threading.Event, primary: bool):
+        if writer is None or not primary:
+            return model.invoke(prompt, timeout=timeout)
+        # A streaming run is in progress: forward chunks to the caller as they arrive
+        res = None
+        for chunk in model.stream(prompt, timeout=timeout):
+            if cancelled.is_set():
+                # A hedged duplicate answered first
+                break
+            writer({"node": node, "text": chunk.content})
+            res = chunk if res is None else res + chunk
+        return res
+    
+    res, retries = call_with_budget(node, attempt, **_call_options(prompt))
+    
+    # Truncated answers are retried with a larger output limit (without streaming: the
+    # caller has already shown the cut-off text and gets the full answer in the node update)
+    cost = 0.0
+    for truncation_retry in range(Config.LLM_TRUNCATION_RETRIES + 1):
+        larger = _larger_profile(node, profile, res, truncation_retry)
+        if larger is None:
+            break
+        cost += _response_cost(profile, res)
+        profile, model = larger, get_llm(node, larger)
+        res, extra_retries = call_with_budget(
+            node, lambda timeout, cancelled, primary: model.invoke(prompt, timeout=timeout), **_call_options(prompt)
+        )
+        retries += extra_retries + 1
+    return _record_response(node, prompt, start, res, retries, cache, key, profile, cost)
+
+async def acall_llm(node: str, template: "PromptTemplate", inputs: Dict[str, Any], stream: bool = True) -> str:
+    """Async call_llm: uses ainvoke/astream and waits for the scheduler without blocking the event loop."""
+    start = time.perf_counter()
+    prompt = template.format(**inputs)
+    
+    # The cache and cassette are SQLite/file I/O behind a lock: nodes that use them do it in a worker thread
+    offload = is_cacheable(node) or bool(Config.LLM_RECORD_PATH)
+    if offload:
+        cache, key, hit = await asyncio.to_thread(_cached_response, node, prompt)
+    else:
+        cache, key, hit = _cached_response(node, prompt)
+    if hit is not None:
+        metrics.record_llm_call(node, time.perf_counter() - start, cache_hit=True)
+        return hit
+    
+    writer = _token_writer() if stream else None
+    profile = generation_profile(node)
+    model = get_llm(node, profile)
+    
+    async def attempt(timeout: float, primary: bool):
+        if writer is None or not primary:
+            return await model.ainvoke(prompt, timeout=timeout)
+        res = None
+        async for chunk in model.astream(prompt, timeout=timeout):
+            writer({"node": node, "text": chunk.content})
+            res = chunk if res is None else res + chunk
+        return res
+    
+    res, retries = await acall_with_budget(node, attempt, **_call_options(prompt))
+    
+    cost = 0.0
+    for truncation_retry in range(Config.LLM_TRUNCATION_RETRIES + 1):
+        larger = _larger_profile(node, profile, res, truncation_retry)
+        if larger is None:
+            break
+        cost += _response_cost(profile, res)
+        profile, model = larger, get_llm(node, larger)
+        res, extra_retries = await acall_with_budget(
+            node, lambda timeout, primary: model.ainvoke(prompt, timeout=timeout), **_call_options(prompt)
+        )
+        retries += extra_retries + 1
+    if offload:
+        return await asyncio.to_thread(_record_response, node, prompt, start, res, retries, cache, key, profile, cost)
+    return _record_response(node, prompt, start, res, retries, cache, key, profile, cost)
+
+def _token_writer():
+    """Return the LangGraph stream writer when the current run asked for token streaming."""
+    from langgraph.config import get_config, get_stream_writer
+    try:
+        config = get_config()
+    except RuntimeError:
+        # Called outside a graph run
+        return None
+    if not config.get("configurable", {}).get("stream_tokens"):
+        return None
+    return get_stream_writer()
+
+def _run_priority() -> str:
+    """Scheduler priority of the current run ("interactive" unless the caller asked for "batch")."""
+    from langgraph.config import get_config
+    try:
+        config = get_config()
+    except RuntimeError:
+        return "interactive"
+    return config.get("configurable", {}).get("priority", "interactive")
+
+def _run_policy() -> IterationPolicy:
+    """Iteration policy of the current run (the caller's, or the one configured in Config)."""
+    from langgraph.config import get_config
+    try:
+        config = get_config()
+    except RuntimeError:
+        return IterationPolicy.from_config()
+    return config.get("configurable", {}).get("iteration_policy") or IterationPolicy.from_config()
+
+def clear_registry():
+    """Drop cached prompts, templates and the compiled graph (next run rebuilds them)."""
+    global _compiled_workflow
+    with _registry_lock:
+        _prompt_cache.clear()
+        _template_cache.clear()
+        _compiled_workflow = None
+
+def _iteration_metrics() -> Dict[str, Any]:
+    """Timing/token summary of the current iteration for its history entry (empty outside a run)."""
+    run = metrics.current_run()
+    return run.close_iteration() if run is not None else {}
 
 # Graph State
 class GraphState(TypedDict):
@@ -33,11 +295,14 @@ class GraphState(TypedDict):
     manager_message: str
     iterations: int
     verifier_feedback: List[str]
+    persona_scores: Dict[str, Dict[str, float]]
     is_approved: bool
     final_output: str
     programmatic_checks_passed: bool
     programmatic_feedback: str
-    history: List[Dict[str, Any]]
+    candidates: List[Dict[str, Any]]
+    # Append-only: nodes return [new_entry] and LangGraph concatenates
+    history: Annotated[List[HistoryEntry], operator.add]
 
 def manual_checks(hook: str) -> tuple[bool, str]:
     """Programmatic rules validator for the generated hook."""
@@ -53,10 +318,45 @@ def manual_checks(hook: str) -> tuple[bool, str]:
             
     return True, "Passed programmatic checks (length <= 10, no filler words)."
 
-def generate_hook_node(state: GraphState) -> GraphState:
-    print(f"Agent: Generator - Creating Hook (Iteration {state.get('iterations', 0) + 1})...")
-    prompt_str = load_prompt("generator_agent.md")
+# Appended to the generator prompt when Config.HOOK_CANDIDATES > 1
+CANDIDATES_SUFFIX = """
+
+**OUTPUT OVERRIDE:** Instead of ONE hook, write {n} different hooks for this recipe, each using a different psychological pattern and each following every rule above.
+Respond ONLY with a JSON array of {n} strings, e.g. ["hook one", "hook two"]."""
+
+_LIST_MARKER = re.compile(r'^\s*(?:\d+[\.\)]|[-*•])\s*')
+_JSON_BLOCK = re.compile(r'(\[.*\]|\{.*\})', re.DOTALL)
+
+def _parse_json_block(text: str) -> Any:
+    """Parse the first JSON array/object in an LLM answer (tolerates code fences and chatter)."""
+    match = _JSON_BLOCK.search(text)
+    if not match:
+        raise ValueError("No JSON found in model output")
+    return json.loads(match.group(1))
+
+def _clean_hook(hook: str) -> str:
+    return hook.strip().strip('"').strip("'").strip()
+
+def _parse_candidates(text: str, n: int) -> List[str]:
+    """Extract up to n distinct hooks from the generator's structured (or, failing that, list-shaped) answer."""
+    try:
+        parsed = _parse_json_block(text)
+        items = parsed if isinstance(parsed, list) else parsed.get("hooks", [])
+        hooks = [_clean_hook(item["hook"] if isinstance(item, dict) else str(item)) for item in items]
+    except (ValueError, AttributeError, KeyError, TypeError):
+        # In a list-shaped answer only the list items are hooks, not a preamble such as "Here are three hooks:"
+        lines = text.splitlines()
+        listed = [line for line in lines if _LIST_MARKER.match(line)]
+        hooks = [_clean_hook(_LIST_MARKER.sub("", line)) for line in listed or lines]
     
+    unique = []
+    for hook in hooks:
+        if hook and hook not in unique:
+            unique.append(hook)
+    return unique[:n]
+
+def _generator_prompt(state: GraphState) -> tuple:
+    """Template and inputs for the generator call of the next iteration."""
     context = ""
     # Incorporate feedback if this is not the first iteration
     if state.get("iterations", 0) > 0:
@@ -65,50 +365,413 @@ def generate_hook_node(state: GraphState) -> GraphState:
         context = f"\n\n**PREVIOUS MANAGER REJECTION FEEDBACK:**\n{manager_msg}\n"
         if prog_fdbk:
             context += f"**PROGRAMMATIC FEEDBACK OVERRIDE:** {prog_fdbk}\n"
-            
-    prompt = PromptTemplate.from_template(prompt_str + "\n\nRecipe: {recipe_description}" + context)
-    chain = prompt | llm
     
-    new_hook = chain.invoke({"recipe_description": state["recipe_description"]})
-    return {"current_hook": new_hook.content.strip(), "iterations": state.get("iterations", 0) + 1}
+    n = Config.HOOK_CANDIDATES
+    suffix = "\n\nRecipe: {recipe_description}{feedback_context}"
+    if n > 1:
+        suffix += CANDIDATES_SUFFIX
+    
+    # Feedback is passed as a variable (not baked into the template) so the template stays cacheable
+    template = get_template("generator_agent.md", suffix)
+    return template, {"recipe_description": state["recipe_description"], "feedback_context": context, "n": n}
 
-def verify_personas_node(state: GraphState) -> GraphState:
-    print("Agent: Verifier Personas - Simulating Reactions...")
+def _generator_update(state: GraphState, new_hook: str) -> GraphState:
+    n = Config.HOOK_CANDIDATES
+    update = {"iterations": state.get("iterations", 0) + 1, "candidates": []}
+    if n > 1:
+        hooks = _parse_candidates(new_hook, n) or [new_hook.strip()]
+        update["candidates"] = [{"hook": hook} for hook in hooks]
+        update["current_hook"] = hooks[0]
+    else:
+        update["current_hook"] = new_hook.strip()
+    return update
+
+def generate_hook_node(state: GraphState) -> GraphState:
+    print(f"Agent: Generator - Creating Hook (Iteration {state.get('iterations', 0) + 1})...")
+    template, inputs = _generator_prompt(state)
+    return _generator_update(state, call_llm("generate_hook", template, inputs))
+
+async def agenerate_hook_node(state: GraphState) -> GraphState:
+    print(f"Agent: Generator - Creating Hook (Iteration {state.get('iterations', 0) + 1})...")
+    template, inputs = _generator_prompt(state)
+    return _generator_update(state, await acall_llm("generate_hook", template, inputs))
+
+def programmatic_check_node(state: GraphState) -> GraphState:
+    """
+    Rules gate between the generator and the LLM reviewers.
+    
+    A hook that fails manual_checks is rejected here, before any persona or manager calls are spent.
+    """
+    print("Agent: Rules Gate - Checking Hook...")
     
-    # Run 22yo
-    p22 = PromptTemplate.from_template(load_prompt("verifier_persona_22yo.md") + "\n\nRecipe: {recipe_description}\nHook: {hook}")
-    ans22 = (p22 | llm).invoke({"recipe_description": state["recipe_description"], "hook": state["current_hook"]})
+    hook = state["current_hook"]
+    candidates = state.get("candidates") or []
+    if candidates:
+        # Multi-candidate mode: filter locally, only survivors go on to the personas
+        checked = []
+        for candidate in candidates:
+            cand_passed, cand_feedback = manual_checks(candidate["hook"])
+            checked.append({**candidate, "passed": cand_passed, "programmatic_feedback": cand_feedback})
+        candidates = checked
+        survivors = [c for c in candidates if c["passed"]]
+        passed = bool(survivors)
+        if passed:
+            hook = survivors[0]["hook"]
+            prog_feedback = f"{survivors[0]['programmatic_feedback']} ({len(survivors)}/{len(candidates)} candidates passed.)"
+        else:
+            reasons = list(dict.fromkeys(c["programmatic_feedback"] for c in candidates))
+            prog_feedback = f"All {len(candidates)} candidates failed programmatic checks: " + " ".join(reasons)
+    else:
+        passed, prog_feedback = manual_checks(hook)
     
-    # Run 28yo
-    p28 = PromptTemplate.from_template(load_prompt("verifier_persona_28yo.md") + "\n\nRecipe: {recipe_description}\nHook: {hook}")
-    ans28 = (p28 | llm).invoke({"recipe_description": state["recipe_description"], "hook": state["current_hook"]})
+    update = {
+        "current_hook": hook,
+        "candidates": candidates,
+        "programmatic_checks_passed": passed,
+        "programmatic_feedback": prog_feedback,
+    }
+    if passed:
+        return update
     
-    # Run 34yo
-    p34 = PromptTemplate.from_template(load_prompt("verifier_persona_34yo.md") + "\n\nRecipe: {recipe_description}\nHook: {hook}")
-    ans34 = (p34 | llm).invoke({"recipe_description": state["recipe_description"], "hook": state["current_hook"]})
+    manager_msg = f"REJECTED: {prog_feedback} Rewrite the hook so it follows the rules."
+    history_entry = HistoryEntry(
+        iteration=state["iterations"],
+        hook=hook,
+        programmatic_feedback=prog_feedback,
+        manager_decision=f"{manager_msg} (Rejected by programmatic checks - personas and manager were skipped.)",
+        is_approved=False,
+        decided_by="rules",
+        candidates=tuple(candidates),
+        metrics=_iteration_metrics()
+    )
     
+    update.update({
+        "manager_message": manager_msg,
+        "is_approved": False,
+        "verifier_feedback": [],
+        "persona_scores": {},
+        "history": [history_entry]
+    })
+    return update
+
+# Audience personas: (key used in structured output, label used in feedback, prompt file).
+# Order is the order feedback is reported in.
+PERSONAS = [
+    ("22yo", "22yo Persona (Neha)", "verifier_persona_22yo.md"),
+    ("28yo", "28yo Persona (Priya)", "verifier_persona_28yo.md"),
+    ("34yo", "34yo Persona (Anjali)", "verifier_persona_34yo.md"),
+]
+
+# Replaces the single-hook suffix when several candidates are scored in one persona call
+PERSONA_BATCH_SUFFIX = """
+
+Recipe: {recipe_description}
+
+**OUTPUT OVERRIDE:** You are shown several candidate hooks instead of one. React to each of them as described above, then rate how likely you are to stop scrolling and to share it (0 = never, 10 = definitely).
+Candidate hooks:
+{candidates}
+
+Respond ONLY with a JSON array containing one object per candidate:
+[{{"index": 1, "reaction": "<your reaction>", "scroll_stop": <0-10>, "share": <0-10>}}]"""
+
+_SCORES_LINE = re.compile(
+    r'\**SCORES:?\**\s*scroll[_ -]?stop\s*[=:]\s*(\d+(?:\.\d+)?)\s*(?:/\s*10)?\s*[,;]?\s*share\s*[=:]\s*(\d+(?:\.\d+)?)\s*(?:/\s*10)?',
+    re.IGNORECASE
+)
+
+def _split_persona_scores(reaction: str) -> tuple:
+    """
+    Separate the SCORES line from a persona's free-text reaction.
+    
+    Returns:
+        (reaction without the scores line, {"scroll_stop", "share"} or None if no scores were given)
+    """
+    match = _SCORES_LINE.search(reaction)
+    if not match:
+        return reaction.strip(), None
+    # Drop a list marker ("2. " or "2) ") that starts the scores line, leaving numbers in the reaction alone
+    before = re.sub(r'(^|\n)[ \t]*\d[\.\)][ \t]*$', r'\1', reaction[:match.start()])
+    text = (before + reaction[match.end():]).strip()
+    return text, {"scroll_stop": _clamp_score(match.group(1)), "share": _clamp_score(match.group(2))}
+
+def _run_persona(prompt_file: str, recipe_description: str, hook: str) -> str:
+    template = get_template(prompt_file, "\n\nRecipe: {recipe_description}\nHook: {hook}")
+    return call_llm("verify_personas", template, {"recipe_description": recipe_description, "hook": hook})
+
+async def _arun_persona(prompt_file: str, recipe_description: str, hook: str) -> str:
+    template = get_template(prompt_file, "\n\nRecipe: {recipe_description}\nHook: {hook}")
+    return await acall_llm("verify_personas", template, {"recipe_description": recipe_description, "hook": hook})
+
+def _clamp_score(value: Any) -> float:
+    return max(0.0, min(10.0, float(value)))
+
+def _candidates_prompt(prompt_file: str, recipe_description: str, hooks: List[str]) -> tuple:
+    template = get_template(prompt_file, PERSONA_BATCH_SUFFIX)
+    numbered = "\n".join(f"{i}. {hook}" for i, hook in enumerate(hooks, start=1))
+    return template, {"recipe_description": recipe_description, "candidates": numbered}
+
+def _parse_candidate_scores(answer: str, hooks: List[str]) -> List[Dict[str, Any]]:
+    """Validate one persona's JSON scores for the candidates; raises ValueError if any is missing."""
+    parsed = _parse_json_block(answer)
+    if not isinstance(parsed, list):
+        raise ValueError("Expected a JSON array of candidate scores")
+    by_index = {int(item["index"]): item for item in parsed if isinstance(item, dict) and "index" in item}
+    missing = [i for i in range(1, len(hooks) + 1) if i not in by_index]
+    if missing:
+        raise ValueError(f"No scores returned for candidates {missing}")
+    
+    return [
+        {
+            "reaction": str(by_index[i].get("reaction", "")).strip(),
+            "scroll_stop": _clamp_score(by_index[i]["scroll_stop"]),
+            "share": _clamp_score(by_index[i]["share"]),
+        }
+        for i in range(1, len(hooks) + 1)
+    ]
+
+def _score_candidates(prompt_file: str, recipe_description: str, hooks: List[str]) -> List[Dict[str, Any]]:
+    """Have one persona react to and score every candidate hook in a single call."""
+    template, inputs = _candidates_prompt(prompt_file, recipe_description, hooks)
+    return _parse_candidate_scores(call_llm("verify_personas", template, inputs), hooks)
+
+async def _ascore_candidates(prompt_file: str, recipe_description: str, hooks: List[str]) -> List[Dict[str, Any]]:
+    template, inputs = _candidates_prompt(prompt_file, recipe_description, hooks)
+    return _parse_candidate_scores(await acall_llm("verify_personas", template, inputs), hooks)
+
+def _fan_out_personas(worker, *args) -> List[tuple]:
+    """
+    Run worker(prompt_file, *args) for every persona on a bounded thread pool.
+    
+    Returns:
+        [(label, result, error)] in PERSONAS order, regardless of completion order
+    """
+    max_workers = max(1, min(Config.PERSONA_MAX_CONCURRENCY, len(PERSONAS)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Each worker runs in a copy of the node's context so the graph config (and token streaming) carries over
+        futures = [
+            executor.submit(contextvars.copy_context().run, worker, prompt_file, *args)
+            for _, _, prompt_file in PERSONAS
+        ]
+        
+        results = []
+        for (_, label, _), future in zip(PERSONAS, futures):
+            try:
+                results.append((label, future.result(), None))
+            except Exception as e:
+                print(f"Verifier {label} failed: {e}")
+                results.append((label, None, e))
+    return results
+
+async def _afan_out_personas(worker, *args) -> List[tuple]:
+    """Async _fan_out_personas: runs the worker coroutines concurrently on the event loop."""
+    limit = asyncio.Semaphore(max(1, Config.PERSONA_MAX_CONCURRENCY))
+    
+    async def bounded(prompt_file):
+        async with limit:
+            return await worker(prompt_file, *args)
+    
+    outcomes = await asyncio.gather(*(bounded(prompt_file) for _, _, prompt_file in PERSONAS), return_exceptions=True)
+    results = []
+    for (_, label, _), outcome in zip(PERSONAS, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Verifier {label} failed: {outcome}")
+            results.append((label, None, outcome))
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results.append((label, outcome, None))
+    return results
+
+def _candidate_score(candidate: Dict[str, Any]) -> float:
+    """Mean of scroll-stop and share scores across the personas that scored the candidate."""
+    scores = candidate.get("scores", {}).values()
+    if not scores:
+        return 0.0
+    return sum((s["scroll_stop"] + s["share"]) / 2 for s in scores) / len(scores)
+
+def _verify_candidates(state: GraphState, survivors: List[Dict[str, Any]]) -> Optional[GraphState]:
+    """Batched persona scoring of all surviving candidates; None if no persona returned usable scores."""
+    hooks = [c["hook"] for c in survivors]
+    results = _fan_out_personas(_score_candidates, state["recipe_description"], hooks)
+    return _candidates_update(state, survivors, results)
+
+async def _averify_candidates(state: GraphState, survivors: List[Dict[str, Any]]) -> Optional[GraphState]:
+    hooks = [c["hook"] for c in survivors]
+    results = await _afan_out_personas(_ascore_candidates, state["recipe_description"], hooks)
+    return _candidates_update(state, survivors, results)
+
+def _candidates_update(state: GraphState, survivors: List[Dict[str, Any]], results: List[tuple]) -> Optional[GraphState]:
+    """Pick the best-scored candidate from the personas' batched scores (None if every persona failed)."""
+    if all(error is not None for _, _, error in results):
+        return None
+    hooks = [c["hook"] for c in survivors]
+    
+    # Attach each persona's scores to the candidates (copies, state is never mutated in place)
+    scored = {c["hook"]: {**c, "scores": {}} for c in survivors}
+    for label, hook_scores, error in results:
+        if error is None:
+            for hook, score in zip(hooks, hook_scores):
+                scored[hook]["scores"][label] = score
+    
+    # Highest mean score wins; ties keep the generator's order
+    best = max(scored.values(), key=_candidate_score)
+    feedbacks = []
+    for label, _, error in results:
+        if error is not None:
+            feedbacks.append(f"**{label}:** [No reaction - verifier failed: {error}]")
+        else:
+            score = best["scores"][label]
+            feedbacks.append(
+                f"**{label}:** {score['reaction']} (scroll-stop {score['scroll_stop']:g}/10, share {score['share']:g}/10)"
+            )
+    
+    candidates = [scored.get(c["hook"], c) for c in state["candidates"]]
+    for candidate in candidates:
+        if "scores" in candidate:
+            candidate["mean_score"] = round(_candidate_score(candidate), 2)
+    print(f"Best of {len(survivors)} candidates: \"{best['hook']}\" ({_candidate_score(best):.1f}/10)")
+    persona_scores = {
+        label: {"scroll_stop": score["scroll_stop"], "share": score["share"]}
+        for label, score in best["scores"].items()
+    }
+    return {
+        "current_hook": best["hook"],
+        "verifier_feedback": feedbacks,
+        "persona_scores": persona_scores,
+        "candidates": candidates,
+    }
+
+def _combined_persona_suffix() -> str:
+    """Persona definitions plus the shared inputs and JSON output contract for the combined-persona prompt."""
+    sections = "\n\n---\n\n".join(load_prompt(prompt_file) for _, _, prompt_file in PERSONAS)
+    keys = ", ".join(f'"{key}"' for key, _, _ in PERSONAS)
+    return (
+        "\n\n---\n\n" + sections + "\n\n---\n\n"
+        "Recipe: {recipe_description}\nHook: {hook}\n\n"
+        "**OUTPUT FORMAT:** Ignore the individual response formats above. Respond ONLY with a JSON object "
+        f"with exactly these keys: {keys}. Each value must be an object of the form\n"
+        '{{"scroll_stop": <0-10>, "share": <0-10>, "rationale": "<her reaction, max two sentences>"}}'
+    )
+
+def _parse_combined_personas(answer: str) -> Dict[str, Dict[str, Any]]:
+    """Validate the combined-persona JSON; raises ValueError if any persona is missing or malformed."""
+    parsed = _parse_json_block(answer)
+    if not isinstance(parsed, dict):
+        raise ValueError("Expected a JSON object keyed by persona")
+    
+    verdicts = {}
+    for key, label, _ in PERSONAS:
+        verdict = parsed.get(key)
+        if not isinstance(verdict, dict):
+            raise ValueError(f"Missing verdict for persona '{key}'")
+        rationale = verdict.get("rationale")
+        if not isinstance(rationale, str) or not rationale.strip():
+            raise ValueError(f"Missing rationale for persona '{key}'")
+        try:
+            verdicts[label] = {
+                "rationale": rationale.strip(),
+                "scroll_stop": _clamp_score(verdict["scroll_stop"]),
+                "share": _clamp_score(verdict["share"]),
+            }
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Missing or non-numeric scores for persona '{key}'")
+    return verdicts
+
+def _verify_combined(state: GraphState) -> Optional[GraphState]:
+    """All three personas in one structured-output call; None if the call or its JSON fails."""
+    template = get_template("verifier_personas_combined.md", _combined_persona_suffix())
+    try:
+        answer = call_llm("verify_personas", template, {
+            "recipe_description": state["recipe_description"], "hook": state["current_hook"]
+        })
+        verdicts = _parse_combined_personas(answer)
+    except Exception as e:
+        print(f"Combined persona call failed ({e}); falling back to one call per persona.")
+        return None
+    return _combined_update(verdicts)
+
+async def _averify_combined(state: GraphState) -> Optional[GraphState]:
+    template = get_template("verifier_personas_combined.md", _combined_persona_suffix())
+    try:
+        answer = await acall_llm("verify_personas", template, {
+            "recipe_description": state["recipe_description"], "hook": state["current_hook"]
+        })
+        verdicts = _parse_combined_personas(answer)
+    except Exception as e:
+        print(f"Combined persona call failed ({e}); falling back to one call per persona.")
+        return None
+    return _combined_update(verdicts)
+
+def _combined_update(verdicts: Dict[str, Dict[str, Any]]) -> GraphState:
     feedbacks = [
-        f"**22yo Persona (Neha):** {ans22.content}",
-        f"**28yo Persona (Priya):** {ans28.content}",
-        f"**34yo Persona (Anjali):** {ans34.content}"
+        f"**{label}:** {v['rationale']} (scroll-stop {v['scroll_stop']:g}/10, share {v['share']:g}/10)"
+        for label, v in verdicts.items()
     ]
-    return {"verifier_feedback": feedbacks}
+    scores = {label: {"scroll_stop": v["scroll_stop"], "share": v["share"]} for label, v in verdicts.items()}
+    return {"verifier_feedback": feedbacks, "persona_scores": scores}
 
-def manager_evaluation_node(state: GraphState) -> GraphState:
-    print("Agent: Manager - Evaluating Hook...")
+def verify_personas_node(state: GraphState) -> GraphState:
+    print("Agent: Verifier Personas - Simulating Reactions...")
     
-    hook = state["current_hook"]
+    survivors = [c for c in state.get("candidates") or [] if c.get("passed")]
+    if len(survivors) > 1:
+        update = _verify_candidates(state, survivors)
+        if update is not None:
+            return update
+        print("Batched candidate scoring failed for every persona; verifying the first candidate only.")
+    
+    if Config.PERSONA_MODE == "combined":
+        update = _verify_combined(state)
+        if update is not None:
+            return update
+    
+    results = _fan_out_personas(_run_persona, state["recipe_description"], state["current_hook"])
+    return _personas_update(results)
+
+async def averify_personas_node(state: GraphState) -> GraphState:
+    print("Agent: Verifier Personas - Simulating Reactions...")
+    
+    survivors = [c for c in state.get("candidates") or [] if c.get("passed")]
+    if len(survivors) > 1:
+        update = await _averify_candidates(state, survivors)
+        if update is not None:
+            return update
+        print("Batched candidate scoring failed for every persona; verifying the first candidate only.")
     
-    # 1. Programmatic Checks
-    passed, prog_feedback = manual_checks(hook)
+    if Config.PERSONA_MODE == "combined":
+        update = await _averify_combined(state)
+        if update is not None:
+            return update
+    
+    results = await _afan_out_personas(_arun_persona, state["recipe_description"], state["current_hook"])
+    return _personas_update(results)
+
+def _personas_update(results: List[tuple]) -> GraphState:
+    """Feedback and scores from one reaction per persona; raises if every persona failed."""
+    feedbacks = []
+    errors = []
+    persona_scores = {}
+    for label, reaction, error in results:
+        if error is None:
+            reaction, scores = _split_persona_scores(reaction)
+            if scores is not None:
+                persona_scores[label] = scores
+                reaction = f"{reaction} (scroll-stop {scores['scroll_stop']:g}/10, share {scores['share']:g}/10)"
+            feedbacks.append(f"**{label}:** {reaction}")
+        else:
+            # Keep the other personas' reactions; the manager sees this one as unavailable
+            errors.append(error)
+            feedbacks.append(f"**{label}:** [No reaction - verifier failed: {error}]")
     
-    # 2. LLM Checks
-    prompt_str = load_prompt("verifier_manager.md")
+    if len(errors) == len(PERSONAS):
+        # Nothing left for the manager to evaluate
+        raise errors[0]
     
-    verifiers_text = "\n".join(state["verifier_feedback"])
-    full_prompt = f"""{prompt_str}
+    return {"verifier_feedback": feedbacks, "persona_scores": persona_scores}
+
+MANAGER_PROMPT_SUFFIX = """
     
-    RECIPE: {state["recipe_description"]}
+    RECIPE: {recipe_description}
     PROPOSED HOOK: {hook}
     
     PROGRAMMATIC CHECKS PASSED: {passed}
@@ -117,65 +780,313 @@ def manager_evaluation_node(state: GraphState) -> GraphState:
     PERSONA FEEDBACK:
     {verifiers_text}
     """
+
+_DECISION_WORD = re.compile(r'\b(NOT\s+APPROVED|APPROVED|REJECTED)\b', re.IGNORECASE)
+
+def parse_manager_decision(manager_ans: str) -> bool:
+    """
+    Whether the manager's answer is an approval.
     
-    res = llm.invoke(full_prompt)
-    manager_ans = res.content.strip()
+    Uses the first APPROVED/REJECTED verdict in the answer, so markdown emphasis or a short
+    preamble in front of "APPROVED: ..." doesn't flip the decision.
+    """
+    match = _DECISION_WORD.search(manager_ans)
+    return bool(match) and match.group(1).upper() == "APPROVED"
+
+_manager_stats_lock = threading.Lock()
+_manager_stats = {"fast_approved": 0, "fast_rejected": 0, "llm_approved": 0, "llm_rejected": 0}
+
+def _record_manager_decision(decided_by: str, is_approved: bool):
+    key = ("fast_" if decided_by == "fast_path" else "llm_") + ("approved" if is_approved else "rejected")
+    with _manager_stats_lock:
+        _manager_stats[key] += 1
+    metrics.REGISTRY.inc("manager_decisions_total", decided_by=decided_by,
+                         outcome="approved" if is_approved else "rejected")
+
+def get_manager_stats() -> Dict[str, Any]:
+    """Manager decision counters for this process, including how often the fast path fired."""
+    with _manager_stats_lock:
+        stats = dict(_manager_stats)
+    fast = stats["fast_approved"] + stats["fast_rejected"]
+    total = fast + stats["llm_approved"] + stats["llm_rejected"]
+    stats["fast_path_rate"] = round(fast / total, 3) if total else 0.0
+    return stats
+
+def fast_path_decision(state: GraphState) -> Optional[tuple]:
+    """
+    Decide locally when the persona scores make the outcome clear.
+    
+    Returns:
+        (is_approved, manager message) for a clear approval or rejection, None for borderline
+        cases (or when any persona is missing scores) which go to the manager LLM.
+    """
+    scores = state.get("persona_scores") or {}
+    if not Config.MANAGER_FAST_PATH or len(scores) < len(PERSONAS):
+        return None
+    
+    persona_means = {label: (s["scroll_stop"] + s["share"]) / 2 for label, s in scores.items()}
+    # Labels look like "22yo Persona (Neha)"; the persona's name is enough here
+    summary = ", ".join(f"{label.split('(')[-1].rstrip(')')} {mean:g}/10" for label, mean in persona_means.items())
+    overall = sum(persona_means.values()) / len(persona_means)
     
-    is_approved = manager_ans.upper().startswith("APPROVED") and passed
-    if passed and not manager_ans.upper().startswith("APPROVED") and not manager_ans.upper().startswith("REJECTED"):
-        # LLM output safeguard
-        is_approved = True if "APPROVED" in manager_ans.upper() else False
+    if state["programmatic_checks_passed"] and min(persona_means.values()) >= Config.MANAGER_FAST_APPROVE_SCORE:
+        return True, f"APPROVED: Every persona would stop and share ({summary}). Auto-approved from persona scores."
+    if overall <= Config.MANAGER_FAST_REJECT_SCORE:
+        weakest = min(persona_means, key=persona_means.get)
+        return False, (
+            f"REJECTED: The personas would scroll past this hook ({summary}). "
+            f"{weakest} reacted worst - write a hook with a much stronger scroll-stop and a clear reason to share it. "
+            "Auto-rejected from persona scores."
+        )
+    return None
 
-    # History logging for UI
-    history_entry = {
-        "iteration": state["iterations"],
-        "hook": hook,
-        "programmatic_feedback": prog_feedback,
-        "verifier_feedback": state["verifier_feedback"],
-        "manager_decision": manager_ans,
-        "is_approved": is_approved
+def _manager_prompt(state: GraphState) -> tuple:
+    template = get_template("verifier_manager.md", MANAGER_PROMPT_SUFFIX)
+    return template, {
+        "recipe_description": state["recipe_description"],
+        "hook": state["current_hook"],
+        # Programmatic checks already ran in the rules gate before any persona calls
+        "passed": state["programmatic_checks_passed"],
+        "prog_feedback": state["programmatic_feedback"],
+        "verifiers_text": "\n".join(state["verifier_feedback"]),
     }
-    
-    new_history = state.get("history", []) + [history_entry]
+
+def _manager_update(state: GraphState, manager_ans: str, is_approved: bool, decided_by: str) -> GraphState:
+    _record_manager_decision(decided_by, is_approved)
+
+    # History logging for UI
+    history_entry = HistoryEntry(
+        iteration=state["iterations"],
+        hook=state["current_hook"],
+        programmatic_feedback=state["programmatic_feedback"],
+        manager_decision=manager_ans,
+        is_approved=is_approved,
+        decided_by=decided_by,
+        verifier_feedback=tuple(state["verifier_feedback"]),
+        persona_scores=state.get("persona_scores") or {},
+        candidates=tuple(state.get("candidates", [])),
+        metrics=_iteration_metrics()
+    )
     
     return {
         "manager_message": manager_ans,
         "is_approved": is_approved,
-        "programmatic_checks_passed": passed,
-        "programmatic_feedback": prog_feedback,
-        "history": new_history
+        "history": [history_entry]
     }
 
+def _finalizer_prompt(state: GraphState, hook: str) -> tuple:
+    template = get_template("finalizer_agent.md", "\n\nAPPROVED HOOK: {hook}\nRECIPE: {recipe}")
+    return template, {"hook": hook, "recipe": state["recipe_description"]}
+
+_speculation_lock = threading.Lock()
+_speculation_stats = {"hit": 0, "miss": 0, "error": 0}
+_speculation_executor: Optional[ThreadPoolExecutor] = None
+
+def should_speculate(state: GraphState) -> bool:
+    """
+    Whether to draft the production card while the manager LLM decides: speculative
+    finalization is on, the hook passed the rules and every persona rated it at least
+    SPECULATIVE_FINALIZE_SCORE (mean of scroll-stop and share), so approval is likely.
+    """
+    scores = state.get("persona_scores") or {}
+    if not Config.SPECULATIVE_FINALIZE or not state["programmatic_checks_passed"] or len(scores) < len(PERSONAS):
+        return False
+    return min((s["scroll_stop"] + s["share"]) / 2 for s in scores.values()) >= Config.SPECULATIVE_FINALIZE_SCORE
+
+def _record_speculation(outcome: str):
+    with _speculation_lock:
+        _speculation_stats[outcome] += 1
+    metrics.REGISTRY.inc("speculative_finalize_total", outcome=outcome)
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """
+    Speculative finalizer calls in this process: "hit" (the manager approved and the card was
+    used), "miss" (the manager rejected the hook or its call failed, so the draft was wasted)
+    and "error" (the draft failed; finalized normally).
+    """
+    with _speculation_lock:
+        stats = dict(_speculation_stats)
+    started = sum(stats.values())
+    stats["hit_rate"] = round(stats["hit"] / started, 3) if started else 0.0
+    stats["wasted_calls"] = stats["miss"] + stats["error"]
+    return stats
+
+def _get_speculation_executor() -> ThreadPoolExecutor:
+    global _speculation_executor
+    if _speculation_executor is None:
+        with _speculation_lock:
+            if _speculation_executor is None:
+                _speculation_executor = ThreadPoolExecutor(max_workers=max(4, Config.LLM_MAX_CONCURRENCY),
+                                                           thread_name_prefix="speculative-finalize")
+    return _speculation_executor
+
+def _speculate(state: GraphState):
+    """Start the finalizer for the current hook in the background; returns its future."""
+    print("Persona feedback looks positive: drafting the Production Card while the manager decides...")
+    template, inputs = _finalizer_prompt(state, state["current_hook"])
+    # Not streamed: the caller must not see a card the manager may still reject
+    return _get_speculation_executor().submit(
+        contextvars.copy_context().run, call_llm, "finalize_hook", template, inputs, False
+    )
+
+def _aspeculate(state: GraphState) -> asyncio.Task:
+    print("Persona feedback looks positive: drafting the Production Card while the manager decides...")
+    template, inputs = _finalizer_prompt(state, state["current_hook"])
+    return asyncio.create_task(acall_llm("finalize_hook", template, inputs, stream=False))
+
+def _settle_speculation(update: GraphState, speculation) -> GraphState:
+    """Keep the speculative card if the manager approved, otherwise drop it."""
+    if speculation is None:
+        return update
+    if not update["is_approved"]:
+        # Only stops the call if it hasn't started yet; otherwise its answer is ignored
+        speculation.cancel()
+        _record_speculation("miss")
+        return update
+    try:
+        update["final_output"] = speculation.result()
+        _record_speculation("hit")
+    except Exception as e:
+        print(f"Speculative finalizer failed ({e}), finalizing normally...")
+        _record_speculation("error")
+    return update
+
+async def _asettle_speculation(update: GraphState, speculation: Optional[asyncio.Task]) -> GraphState:
+    """_settle_speculation for a speculative task; a rejected card's request is cancelled."""
+    if speculation is None:
+        return update
+    if not update["is_approved"]:
+        if speculation.done() and not speculation.cancelled():
+            speculation.exception()  # retrieved so asyncio doesn't log it
+        speculation.cancel()
+        _record_speculation("miss")
+        return update
+    try:
+        update["final_output"] = await speculation
+        _record_speculation("hit")
+    except Exception as e:
+        print(f"Speculative finalizer failed ({e}), finalizing normally...")
+        _record_speculation("error")
+    return update
+
+def manager_evaluation_node(state: GraphState) -> GraphState:
+    print("Agent: Manager - Evaluating Hook...")
+    
+    # Rule-based fast path for clear-cut persona verdicts, LLM manager for the borderline ones
+    fast_decision = fast_path_decision(state)
+    if fast_decision is not None:
+        return _manager_update(state, fast_decision[1], fast_decision[0], "fast_path")
+    
+    template, inputs = _manager_prompt(state)
+    speculation = _speculate(state) if should_speculate(state) else None
+    try:
+        manager_ans = call_llm("manager_evaluation", template, inputs).strip()
+    except BaseException:
+        if speculation is not None:
+            # Like a rejection: stopped if it hasn't started, otherwise its answer is ignored
+            speculation.cancel()
+            _record_speculation("miss")
+        raise
+    is_approved = parse_manager_decision(manager_ans) and state["programmatic_checks_passed"]
+    return _settle_speculation(_manager_update(state, manager_ans, is_approved, "llm"), speculation)
+
+async def amanager_evaluation_node(state: GraphState) -> GraphState:
+    print("Agent: Manager - Evaluating Hook...")
+    
+    fast_decision = fast_path_decision(state)
+    if fast_decision is not None:
+        return _manager_update(state, fast_decision[1], fast_decision[0], "fast_path")
+    
+    template, inputs = _manager_prompt(state)
+    speculation = _aspeculate(state) if should_speculate(state) else None
+    try:
+        manager_ans = (await acall_llm("manager_evaluation", template, inputs)).strip()
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+            _record_speculation("miss")
+        raise
+    is_approved = parse_manager_decision(manager_ans) and state["programmatic_checks_passed"]
+    return await _asettle_speculation(_manager_update(state, manager_ans, is_approved, "llm"), speculation)
+
+def _final_hook(state: GraphState) -> str:
+    """The approved hook, or the best-rated attempt when the run stopped without an approval."""
+    if state["is_approved"]:
+        return state["current_hook"]
+    best = _run_policy().best_attempt(state.get("history") or [])
+    if best is None:
+        return state["current_hook"]
+    if best.hook != state["current_hook"]:
+        print(f"Finalizing the hook from iteration {best.iteration}, the best rated so far.")
+    return best.hook
+
 def finalize_hook_node(state: GraphState) -> GraphState:
+    if state.get("final_output"):
+        print("Agent: Finalizer - Production Card was drafted during manager evaluation.")
+        return {"final_output": state["final_output"]}
     print("Agent: Finalizer - Generating Production Card...")
-    prompt_str = load_prompt("finalizer_agent.md")
-    prompt = PromptTemplate.from_template(prompt_str + "\n\nAPPROVED HOOK: {hook}\nRECIPE: {recipe}")
-    res = (prompt | llm).invoke({"hook": state["current_hook"], "recipe": state["recipe_description"]})
+    hook = _final_hook(state)
+    res = call_llm("finalize_hook", *_finalizer_prompt(state, hook))
     
-    return {"final_output": res.content}
+    return {"final_output": res, "current_hook": hook}
+
+async def afinalize_hook_node(state: GraphState) -> GraphState:
+    if state.get("final_output"):
+        print("Agent: Finalizer - Production Card was drafted during manager evaluation.")
+        return {"final_output": state["final_output"]}
+    print("Agent: Finalizer - Generating Production Card...")
+    hook = _final_hook(state)
+    res = await acall_llm("finalize_hook", *_finalizer_prompt(state, hook))
+    
+    return {"final_output": res, "current_hook": hook}
+
+def gate_router(state: GraphState) -> Literal["verify_personas", "finalize_hook", "generate_hook"]:
+    if state["programmatic_checks_passed"]:
+        return "verify_personas"
+    print(f"Rules gate rejected the hook: {state['programmatic_feedback']}")
+    return router(state)
 
 def router(state: GraphState) -> Literal["finalize_hook", "generate_hook"]:
     if state["is_approved"]:
         print("Manager approved the hook!")
         return "finalize_hook"
-    if state["iterations"] >= 3:
-        print("Reached max iterations (3). Finalizing best possible hook...")
+    policy = _run_policy()
+    run = metrics.current_run()
+    stop_reason = policy.stop_reason(state, run.spent() if run is not None else None)
+    if stop_reason is not None:
+        print(f"{stop_reason} Finalizing the best hook so far...")
+        limit = "max_iterations" if state["iterations"] >= policy.max_iterations else "budget"
+        metrics.REGISTRY.inc("iteration_stops_total", reason=limit)
         return "finalize_hook"
     
-    print("Manager rejected. Returning to Generator...")
+    print("Hook rejected. Returning to Generator...")
     return "generate_hook"
 
-def run_workflow(recipe_description: str) -> GraphState:
+def build_workflow(checkpointer=None):
+    """Build and compile the multi-agent StateGraph."""
+    # Deferred with the model client: langgraph is only needed once the first run starts
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, END
     workflow = StateGraph(GraphState)
     
-    workflow.add_node("generate_hook", generate_hook_node)
-    workflow.add_node("verify_personas", verify_personas_node)
-    workflow.add_node("manager_evaluation", manager_evaluation_node)
-    workflow.add_node("finalize_hook", finalize_hook_node)
+    # Each node has a sync implementation (used by invoke/stream) and an async one (ainvoke/astream)
+    nodes = [
+        ("generate_hook", generate_hook_node, agenerate_hook_node),
+        ("programmatic_check", programmatic_check_node, programmatic_check_node),
+        ("verify_personas", verify_personas_node, averify_personas_node),
+        ("manager_evaluation", manager_evaluation_node, amanager_evaluation_node),
+        ("finalize_hook", finalize_hook_node, afinalize_hook_node),
+    ]
+    for name, func, afunc in nodes:
+        workflow.add_node(name, RunnableLambda(metrics.timed_node(name, func), afunc=metrics.atimed_node(name, afunc)))
     
     workflow.set_entry_point("generate_hook")
     
-    workflow.add_edge("generate_hook", "verify_personas")
+    workflow.add_edge("generate_hook", "programmatic_check")
+    workflow.add_conditional_edges(
+        "programmatic_check",
+        gate_router
+    )
     workflow.add_edge("verify_personas", "manager_evaluation")
     
     workflow.add_conditional_edges(
@@ -184,28 +1095,182 @@ def run_workflow(recipe_description: str) -> GraphState:
     )
     workflow.add_edge("finalize_hook", END)
     
-    app = workflow.compile()
-    
-    initial_state = {
+    return workflow.compile(checkpointer=checkpointer)
+
+def build_checkpointer():
+    """SQLite checkpointer that saves run state after every node (None when disabled)."""
+    if not Config.CHECKPOINT_ENABLED:
+        return None
+    from checkpoints import open_checkpointer
+    return open_checkpointer(Config.CHECKPOINT_PATH, Config.CHECKPOINT_TTL_SECONDS)
+
+def get_workflow():
+    """Return the process-wide compiled graph, compiling it on first use."""
+    global _compiled_workflow
+    if _compiled_workflow is None:
+        with _registry_lock:
+            if _compiled_workflow is None:
+                _compiled_workflow = build_workflow(build_checkpointer())
+    return _compiled_workflow
+
+def _initial_state(recipe_description: str) -> GraphState:
+    return {
         "recipe_description": recipe_description,
         "current_hook": "",
         "manager_message": "",
         "iterations": 0,
         "verifier_feedback": [],
+        "persona_scores": {},
         "is_approved": False,
         "programmatic_checks_passed": False,
         "programmatic_feedback": "",
+        "candidates": [],
         "history": [],
         "final_output": ""
     }
+
+def _resume_point(app, config: Dict[str, Any], recipe_description: str) -> Optional[Dict[str, Any]]:
+    """
+    Saved state of an unfinished checkpointed run for config's run ID, or None to start fresh.
+    
+    A run ID whose checkpoint belongs to a different recipe is cleared and started over.
+    """
+    if app.checkpointer is None:
+        return None
+    return _saved_state(app, config, recipe_description, app.get_state(config))
+
+async def _aresume_point(app, config: Dict[str, Any], recipe_description: str) -> Optional[Dict[str, Any]]:
+    if app.checkpointer is None:
+        return None
+    return _saved_state(app, config, recipe_description, await app.aget_state(config))
+
+def _saved_state(app, config: Dict[str, Any], recipe_description: str, snapshot) -> Optional[Dict[str, Any]]:
+    if not snapshot.values:
+        return None
+    # Finished runs delete their checkpoints, so any saved state belongs to an unfinished run.
+    # (snapshot.next can't be used: it is empty when the last node's writes were saved as pending.)
+    if snapshot.values.get("recipe_description") == recipe_description:
+        print(f"Resuming run {config['configurable']['thread_id']} from its last checkpoint...")
+        return dict(snapshot.values)
+    app.checkpointer.delete_thread(config["configurable"]["thread_id"])
+    return None
+
+def _finish_run(app, run_id: str):
+    # Completed runs are returned to the caller, so their checkpoints are no longer needed
+    if app.checkpointer is not None:
+        app.checkpointer.delete_thread(run_id)
+
+def _store_result(state: Dict[str, Any]):
+    # Spill the finished run to the on-disk results store (RESULTS_STORE_PATH) for analysis
+    store = get_results_store()
+    if store is not None:
+        store.save_run(state)
+
+def _run_config(run_id: str, run_metrics: metrics.RunMetrics, priority: str,
+                policy: Optional[IterationPolicy] = None, **extra: Any) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": run_id, "run_metrics": run_metrics, "priority": priority,
+                             "iteration_policy": policy, **extra}}
+
+def run_workflow(recipe_description: str, priority: str = "interactive", run_id: Optional[str] = None,
+                 policy: Optional[IterationPolicy] = None) -> GraphState:
+    """
+    Run the workflow to completion.
     
-    final_state = app.invoke(initial_state)
+    With checkpointing enabled, state is saved after every node under `run_id`; calling again
+    with the same run ID after a failure continues from the last completed node. `policy`
+    overrides the configured iteration limit and run budget for this run.
+    """
+    app = get_workflow()
+    run_id = run_id or uuid.uuid4().hex
+    run_metrics = metrics.RunMetrics()
+    config = _run_config(run_id, run_metrics, priority, policy)
+    
+    saved = _resume_point(app, config, recipe_description)
+    final_state = app.invoke(
+        _initial_state(recipe_description) if saved is None else None,
+        config=config,
+    )
+    _finish_run(app, run_id)
+    final_state["metrics"] = run_metrics.summary()
+    final_state["run_id"] = run_id
+    _store_result(final_state)
     return final_state
 
-def run_full_chain(recipe_description: str) -> Dict[str, Any]:
+async def arun_workflow(recipe_description: str, priority: str = "interactive",
+                        run_id: Optional[str] = None, policy: Optional[IterationPolicy] = None) -> GraphState:
+    """
+    Async run_workflow: every node awaits its model calls, so one event loop can hold
+    hundreds of in-flight runs without a thread per run.
+    """
+    app = get_workflow()
+    run_id = run_id or uuid.uuid4().hex
+    run_metrics = metrics.RunMetrics()
+    config = _run_config(run_id, run_metrics, priority, policy)
+    
+    saved = await _aresume_point(app, config, recipe_description)
+    final_state = await app.ainvoke(
+        _initial_state(recipe_description) if saved is None else None,
+        config=config,
+    )
+    if app.checkpointer is not None:
+        await app.checkpointer.adelete_thread(run_id)
+    final_state["metrics"] = run_metrics.summary()
+    final_state["run_id"] = run_id
+    await asyncio.to_thread(_store_result, final_state)
+    return final_state
+
+def stream_workflow(recipe_description: str, priority: str = "interactive", run_id: Optional[str] = None,
+                    policy: Optional[IterationPolicy] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run the workflow and yield progress events as they happen.
+    
+    Yields:
+        {"type": "resume", "state": dict} first, with the saved state, when a checkpointed run is continued,
+        {"type": "token", "node": str, "text": str} for each LLM output chunk,
+        {"type": "node", "node": str, "update": dict} when a node finishes, and finally
+        {"type": "done", "state": dict} with the same final state run_workflow returns.
+    """
+    app = get_workflow()
+    run_id = run_id or uuid.uuid4().hex
+    run_metrics = metrics.RunMetrics()
+    config = _run_config(run_id, run_metrics, priority, policy, stream_tokens=True)
+    
+    saved = _resume_point(app, config, recipe_description)
+    if saved is None:
+        state = _initial_state(recipe_description)
+        graph_input = dict(state)
+    else:
+        state, graph_input = saved, None
+        yield {"type": "resume", "state": dict(state)}
+    
+    for mode, payload in app.stream(graph_input, config=config, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            yield {"type": "token", "node": payload["node"], "text": payload["text"]}
+            continue
+        for node, update in payload.items():
+            if node.startswith("__"):
+                # Bookkeeping entries such as __metadata__ when replaying a resumed node's saved writes
+                continue
+            merge_update(state, update or {})
+            yield {"type": "node", "node": node, "update": update or {}}
+    
+    _finish_run(app, run_id)
+    state["metrics"] = run_metrics.summary()
+    state["run_id"] = run_id
+    _store_result(state)
+    yield {"type": "done", "state": state}
+
+def run_full_chain(recipe_description: str, priority: str = "interactive",
+                   run_id: Optional[str] = None, policy: Optional[IterationPolicy] = None) -> Dict[str, Any]:
     """
     Run the LangGraph workflow from recipe to production card.
     
+    Args:
+        recipe_description: The recipe or video idea
+        priority: Scheduler priority for the run's model calls ("interactive" or "batch")
+        run_id: Checkpoint key; pass the ID of a failed run to continue it instead of starting over
+        policy: Iteration limit and LLM call/token/seconds budget for this run (default: from Config)
+    
     Returns:
         Dictionary containing state at the end of execution.
     """
@@ -213,10 +1278,47 @@ def run_full_chain(recipe_description: str) -> Dict[str, Any]:
     print("Starting LangGraph Multi-Agent Workflow...")
     print("=" * 80 + "\n")
     
-    result = run_workflow(recipe_description)
+    result = run_workflow(recipe_description, priority, run_id, policy)
+    
+    print("\n" + "=" * 80)
+    print("Webcast Graph Complete!")
+    print("=" * 80)
+    
+    return result
+
+async def arun_full_chain(recipe_description: str, priority: str = "interactive",
+                         run_id: Optional[str] = None, policy: Optional[IterationPolicy] = None) -> Dict[str, Any]:
+    """
+    Async run_full_chain, for callers that already run an event loop.
+    
+    Example:
+        results = await asyncio.gather(*(arun_full_chain(recipe) for recipe in recipes))
+    """
+    print("\n" + "=" * 80)
+    print("Starting LangGraph Multi-Agent Workflow (async)...")
+    print("=" * 80 + "\n")
+    
+    result = await arun_workflow(recipe_description, priority, run_id, policy)
     
     print("\n" + "=" * 80)
     print("Webcast Graph Complete!")
     print("=" * 80)
     
     return result
+
+def stream_full_chain(recipe_description: str, run_id: Optional[str] = None,
+                      policy: Optional[IterationPolicy] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_full_chain.
+    
+    Yields the events from stream_workflow; the last event is {"type": "done", "state": ...}.
+    """
+    print("\n" + "=" * 80)
+    print("Starting LangGraph Multi-Agent Workflow (streaming)...")
+    print("=" * 80 + "\n")
+    
+    yield from stream_workflow(recipe_description, run_id=run_id, policy=policy)
+    
+    print("\n" + "=" * 80)
+    print("Webcast Graph Complete!")
+    print("=" * 80)
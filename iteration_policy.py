@@ -0,0 +1,103 @@
+"""
+When a run stops iterating, and which of its attempts gets finalized.
+A run stops after MAX_ITERATIONS, or earlier once its budget (LLM calls, tokens, wall-clock
+seconds) can't cover another full iteration plus the finalizer, so each request's latency
+and spend stay bounded. Every attempt in the run's history is scored from the persona
+ratings, and the finalizer gets the best one rather than whichever came last.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from run_records import HistoryEntry
+
+# Added to an approved attempt's score so it always outranks rejected ones
+APPROVED_BONUS = 10.0
+
+
+@dataclass(frozen=True)
+class IterationPolicy:
+    """Iteration limit and per-run budget; a budget of 0 means unlimited."""
+
+    max_iterations: int = 3
+    max_llm_calls: int = 0
+    max_tokens: int = 0
+    max_seconds: float = 0.0
+
+    @classmethod
+    def from_config(cls) -> "IterationPolicy":
+        return cls(
+            max_iterations=Config.MAX_ITERATIONS,
+            max_llm_calls=Config.RUN_MAX_LLM_CALLS,
+            max_tokens=Config.RUN_MAX_TOKENS,
+            max_seconds=Config.RUN_MAX_SECONDS,
+        )
+
+    @property
+    def has_budget(self) -> bool:
+        return bool(self.max_llm_calls or self.max_tokens or self.max_seconds)
+
+    @staticmethod
+    def next_iteration_cost(history: List[HistoryEntry]) -> Dict[str, float]:
+        """
+        Estimated LLM calls, tokens and seconds of one more full iteration plus the finalizer.
+
+        Uses the most expensive iteration so far (ignoring ones the rules gate cut short, unless
+        there are no others) and one average model call for the finalizer.
+        """
+        measured = [entry.metrics for entry in history if entry.metrics]
+        full = [entry.metrics for entry in history if entry.metrics and entry.decided_by != "rules"] or measured
+        if not full:
+            return {"llm_calls": 0, "tokens": 0, "seconds": 0.0}
+        calls = sum(m.get("llm_calls", 0) for m in full)
+        tokens = sum(m.get("input_tokens", 0) + m.get("output_tokens", 0) for m in full)
+        llm_seconds = sum(n.get("llm_seconds", 0.0) for m in full for n in m.get("nodes", {}).values())
+        per_call = (tokens / calls, llm_seconds / calls) if calls else (0, 0.0)
+        return {
+            "llm_calls": max(m.get("llm_calls", 0) for m in full) + 1,
+            "tokens": max(m.get("input_tokens", 0) + m.get("output_tokens", 0) for m in full) + per_call[0],
+            "seconds": max(m.get("seconds", 0.0) for m in full) + per_call[1],
+        }
+
+    def stop_reason(self, state: Dict[str, Any], spent: Optional[Dict[str, float]]) -> Optional[str]:
+        """
+        Why the run should finalize now instead of generating another hook (None = keep going).
+
+        Args:
+            state: Graph state after a rejected attempt
+            spent: {"llm_calls", "tokens", "seconds"} used by the run so far (None outside a run)
+        """
+        if state.get("iterations", 0) >= self.max_iterations:
+            return f"Reached max iterations ({self.max_iterations})."
+        if spent is None or not self.has_budget:
+            return None
+        cost = self.next_iteration_cost(state.get("history") or [])
+        limits = [("LLM calls", "llm_calls", self.max_llm_calls), ("tokens", "tokens", self.max_tokens),
+                  ("seconds", "seconds", self.max_seconds)]
+        for label, key, limit in limits:
+            if limit and spent[key] + cost[key] > limit:
+                return (f"Budget can't cover another iteration ({label}: {round(spent[key], 1):g} spent, "
+                        f"~{round(cost[key], 1):g} more needed, limit {limit:g}).")
+        return None
+
+    @staticmethod
+    def score(entry: HistoryEntry) -> Optional[float]:
+        """
+        How good an attempt was: the mean persona rating (scroll-stop and share, 0-10), plus
+        APPROVED_BONUS if it was approved. None for hooks the rules gate rejected.
+        """
+        if entry.decided_by == "rules":
+            return None
+        ratings = [(s["scroll_stop"] + s["share"]) / 2 for s in (entry.persona_scores or {}).values()]
+        score = sum(ratings) / len(ratings) if ratings else 0.0
+        return score + APPROVED_BONUS if entry.is_approved else score
+
+    def best_attempt(self, history: List[HistoryEntry]) -> Optional[HistoryEntry]:
+        """The highest-scoring attempt (the later one on ties), or None if none was scored."""
+        best, best_score = None, None
+        for entry in history:
+            score = self.score(entry)
+            if score is not None and (best_score is None or score >= best_score):
+                best, best_score = entry, score
+        return best
@@ -0,0 +1,170 @@
+"""
+In-process background job queue for workflow runs.
+The Streamlit app submits a run and keeps only the job ID in its session; a bounded worker
+pool shared by every session in the process runs the chain, recording status, partial
+history and streamed text that the UI polls. Jobs can be cancelled between workflow events.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from config import Config
+from run_records import merge_update
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled."""
+
+
+class Job:
+    """One workflow run and everything the UI needs to render its progress."""
+
+    def __init__(self, description: str, run_id: str):
+        self.id = uuid.uuid4().hex
+        self.description = description
+        self.run_id = run_id
+        self.status = QUEUED
+        self.state: Dict[str, Any] = {"history": [], "final_output": ""}
+        self.streaming_node: Optional[str] = None
+        self.streamed_text = ""
+        self.resumed = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the job's progress that is safe to read from another thread."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "description": self.description,
+                "run_id": self.run_id,
+                "status": self.status,
+                "state": dict(self.state),
+                "streaming_node": self.streaming_node,
+                "streamed_text": self.streamed_text,
+                "resumed": self.resumed,
+                "result": self.result,
+                "error": self.error,
+            }
+
+    def _apply(self, event: Dict[str, Any]):
+        with self._lock:
+            if event["type"] == "resume":
+                self.resumed = True
+                self.state.update(event["state"])
+            elif event["type"] == "token":
+                if event["node"] != self.streaming_node:
+                    self.streaming_node, self.streamed_text = event["node"], ""
+                self.streamed_text += event["text"]
+            elif event["type"] == "node":
+                self.streaming_node, self.streamed_text = None, ""
+                merge_update(self.state, event["update"])
+            elif event["type"] == "done":
+                self.result = event["state"]
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.streaming_node, self.streamed_text = None, ""
+            self.finished_at = time.time()
+
+
+class JobQueue:
+    """Bounded pool of workflow runs shared by every session in the process."""
+
+    def __init__(self, max_workers: int = 4, result_ttl_seconds: float = 3600):
+        self.max_workers = max_workers
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hook-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, description: str, run_id: Optional[str] = None) -> str:
+        """Queue a workflow run and return its job ID."""
+        self._expire()
+        job = Job(description, run_id or uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def _run(self, job: Job):
+        # Imported here so the queue can be created without loading the graph module
+        from instagram_hook_chain import stream_full_chain
+
+        if job.cancel_requested.is_set():
+            job._finish(CANCELLED)
+            return
+        with job._lock:
+            job.status = RUNNING
+        events = stream_full_chain(job.description, run_id=job.run_id)
+        try:
+            for event in events:
+                if job.cancel_requested.is_set():
+                    raise JobCancelled()
+                job._apply(event)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(ERROR, str(e))
+        else:
+            job._finish(DONE)
+        finally:
+            # Closing the generator stops the graph; its checkpoint keeps the completed nodes
+            events.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, or None if the ID is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job to stop; it ends after the model call in progress. False if already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_requested.set()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
+
+    def _expire(self):
+        """Forget finished jobs older than result_ttl_seconds."""
+        cutoff = time.time() - self.result_ttl_seconds
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, sized from Config on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(Config.JOB_WORKERS, Config.JOB_RESULT_TTL_SECONDS)
+    return _job_queue
@@ -5,24 +5,135 @@ Handles API requests, response parsing, and error handling.
 
 import requests
 import json
-from typing import Dict, Any, Optional
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+from requests.adapters import HTTPAdapter
 from config import Config
 
 
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Hook list patterns, compiled once at import
+NUMBERED_PATTERN = re.compile(r'\d+[\.\)]\s*(.+?)(?=\d+[\.\)]|$)', re.DOTALL)
+BULLET_PATTERN = re.compile(r'[-*•]\s*(.+?)(?=[-*•]|$)', re.DOTALL)
+# A line that starts a new list item ("1.", "2)", "-", "*", "•"), used by the streaming parser
+LIST_ITEM_START = re.compile(r'^\s*(?:\d+[\.\)]|[-*•])\s*')
+
+
+def _known_content(response: Any) -> Optional[str]:
+    """Message content at the standard Langflow path outputs[0].outputs[0].results.message.content."""
+    try:
+        content = response["outputs"][0]["outputs"][0]["results"]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return content if isinstance(content, str) else None
+
+
+class HookStreamParser:
+    """
+    Incrementally extracts hooks from text that arrives in chunks.
+    
+    List items ("1. ...", "- ...") are emitted as soon as the next item or a blank line
+    starts. Unmarked lines are held back until the end of the stream, since they may
+    just be a preamble in front of a list (matching the non-streaming parser, which
+    only falls back to one-hook-per-line when no list is found).
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._current: Optional[str] = None
+        self._plain_lines: List[str] = []
+        self._seen_list = False
+    
+    def _finish_item(self) -> List[str]:
+        hook, self._current = self._current, None
+        return [hook.strip()] if hook and hook.strip() else []
+    
+    def _process_line(self, line: str) -> List[str]:
+        marker = LIST_ITEM_START.match(line)
+        if marker:
+            done = self._finish_item()
+            self._seen_list = True
+            self._plain_lines = []  # anything before the list was a preamble
+            self._current = line[marker.end():]
+            return done
+        if not line.strip():
+            return self._finish_item()
+        if self._current is not None:
+            self._current += " " + line.strip()
+        elif not self._seen_list:
+            self._plain_lines.append(line.strip())
+        return []
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of text; returns any hooks completed by it."""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        hooks = []
+        for line in lines:
+            hooks.extend(self._process_line(line))
+        return hooks
+    
+    def close(self) -> List[str]:
+        """Flush the stream; returns the remaining hooks."""
+        hooks = self._process_line(self._buffer) if self._buffer else []
+        self._buffer = ""
+        hooks.extend(self._finish_item())
+        if not self._seen_list:
+            hooks.extend(line for line in self._plain_lines if len(line) > 10)
+        self._plain_lines = []
+        return hooks
+
+
 class LangflowClient:
     """Client for interacting with Langflow API."""
     
-    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_retries: Optional[int] = None, backoff_seconds: Optional[float] = None,
+                 pool_size: Optional[int] = None):
         """
         Initialize Langflow client.
         
         Args:
             api_url: Langflow API endpoint URL (defaults to Config.LANGFLOW_API_URL)
             api_key: API key for authentication (defaults to Config.LANGFLOW_API_KEY)
+            max_retries: Retries on 429/5xx/connection errors (defaults to Config.LANGFLOW_MAX_RETRIES)
+            backoff_seconds: Base delay for exponential backoff with jitter (defaults to Config.LANGFLOW_BACKOFF_SECONDS)
+            pool_size: Keep-alive connections kept open (defaults to Config.LANGFLOW_POOL_SIZE)
+            
+        Raises:
+            ValueError: If max_retries is negative
         """
         self.api_url = api_url or Config.LANGFLOW_API_URL
         self.api_key = api_key or Config.LANGFLOW_API_KEY
         self.timeout = Config.REQUEST_TIMEOUT
+        self.max_retries = Config.LANGFLOW_MAX_RETRIES if max_retries is None else max_retries
+        if self.max_retries < 0:
+            raise ValueError(f"max_retries must be 0 or more, got {self.max_retries}")
+        self.backoff_seconds = Config.LANGFLOW_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.pool_size = pool_size or Config.LANGFLOW_POOL_SIZE
+        
+        # One pooled session per client: connections (and TLS handshakes) are reused across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self._get_headers())
+    
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
         
     def _get_headers(self) -> Dict[str, str]:
         """Get HTTP headers for API requests."""
@@ -61,14 +172,9 @@ class LangflowClient:
         if flow_id:
             payload["flow_id"] = flow_id
         
-        try:
-            # Make API request
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+        with self._translate_errors():
+            # Make API request (retried on 429/5xx and connection errors)
+            response = self._post_with_retries(payload)
             
             # Raise exception for bad status codes
             response.raise_for_status()
@@ -77,7 +183,12 @@ class LangflowClient:
             result = response.json()
             
             return result
-            
+    
+    @contextmanager
+    def _translate_errors(self):
+        """Turn low-level requests/JSON errors into the client's user-facing errors."""
+        try:
+            yield
         except requests.exceptions.Timeout:
             raise requests.exceptions.RequestException(
                 f"Request to Langflow API timed out after {self.timeout} seconds"
@@ -94,6 +205,130 @@ class LangflowClient:
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON response from Langflow API")
     
+    def generate_hooks_stream(self, video_description: str, flow_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream hooks one at a time from Langflow's streamed run endpoint (?stream=true).
+        
+        Token events are fed through a HookStreamParser, so each hook is yielded as soon as
+        it is complete instead of after the whole flow finishes. If the server answers with
+        a single (non-streamed) JSON body, its hooks are yielded from that instead.
+        
+        Args:
+            video_description: User's description of the video they want to create
+            flow_id: Optional Langflow flow ID (defaults to Config.LANGFLOW_FLOW_ID)
+            
+        Yields:
+            Hook strings, in the order the flow produces them
+            
+        Raises:
+            requests.exceptions.RequestException: If API request fails
+            ValueError: If a streamed event is not valid JSON
+        """
+        flow_id = flow_id or Config.LANGFLOW_FLOW_ID
+        payload = {
+            "input_value": video_description,
+            "output_type": "chat",
+            "input_type": "chat"
+        }
+        if flow_id:
+            payload["flow_id"] = flow_id
+        
+        parser = HookStreamParser()
+        streamed_tokens = False
+        with self._translate_errors():
+            # Retries only apply before the first byte; a stream that breaks midway is raised
+            response = self._post_with_retries(payload, params={"stream": "true"}, stream=True)
+            with response:
+                response.raise_for_status()
+                # NDJSON/SSE responses often omit the charset; without one iter_lines yields bytes
+                response.encoding = response.encoding or "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    if line.startswith("data:"):
+                        # Server-sent events framing
+                        line = line[len("data:"):].strip()
+                    event = json.loads(line)
+                    
+                    if event.get("event") == "token":
+                        streamed_tokens = True
+                        yield from parser.feed(event.get("data", {}).get("chunk", ""))
+                    elif event.get("event") == "end" or "event" not in event:
+                        # Flow finished; without token events the full answer is only in the result
+                        if not streamed_tokens:
+                            result = event.get("data", {}).get("result", event)
+                            content = _known_content(result)
+                            if content is None:
+                                yield from self.parse_hooks_response(result)
+                                return
+                            yield from parser.feed(content)
+                        break
+        
+        yield from parser.close()
+    
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Exponential backoff with full jitter; a Retry-After header from the server takes precedence."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+    
+    def _post_with_retries(self, payload: Dict[str, Any], **kwargs: Any) -> requests.Response:
+        """POST the payload, retrying retryable status codes, timeouts and connection errors."""
+        for attempt in range(self.max_retries + 1):
+            is_last = attempt == self.max_retries
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if is_last:
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                continue
+            
+            if response.status_code not in RETRY_STATUS_CODES or is_last:
+                return response
+            response.close()
+            time.sleep(self._backoff_delay(attempt, response))
+    
+    def generate_hooks_many(self, video_descriptions: List[str], flow_id: Optional[str] = None,
+                            max_concurrency: Optional[int] = None,
+                            return_exceptions: bool = False) -> List[Any]:
+        """
+        Generate hooks for several descriptions concurrently over the pooled session.
+        
+        Args:
+            video_descriptions: Descriptions to send
+            flow_id: Optional Langflow flow ID (defaults to Config.LANGFLOW_FLOW_ID)
+            max_concurrency: Requests in flight at once (defaults to Config.LANGFLOW_MAX_CONCURRENCY)
+            return_exceptions: Put a failed request's exception in its slot instead of raising it
+            
+        Returns:
+            Responses in the same order as video_descriptions
+            
+        Raises:
+            requests.exceptions.RequestException, ValueError: The first failure, unless return_exceptions is set
+        """
+        max_concurrency = max(1, min(max_concurrency or Config.LANGFLOW_MAX_CONCURRENCY, len(video_descriptions) or 1))
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [executor.submit(self.generate_hooks, description, flow_id) for description in video_descriptions]
+            
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    if not return_exceptions:
+                        # Don't send requests that haven't started yet
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    results.append(e)
+        return results
+    
     def parse_hooks_response(self, response: Dict[str, Any]) -> list:
         """
         Parse Langflow API response to extract hook recommendations.
@@ -108,22 +343,10 @@ class LangflowClient:
         
         # Try to extract hooks from different possible response structures
         if isinstance(response, dict):
-            # Check for common response fields
-            if "outputs" in response:
-                outputs = response["outputs"]
-                if isinstance(outputs, list) and len(outputs) > 0:
-                    output = outputs[0]
-                    if isinstance(output, dict) and "outputs" in output:
-                        data = output["outputs"]
-                        if isinstance(data, list) and len(data) > 0:
-                            result = data[0]
-                            if isinstance(result, dict) and "results" in result:
-                                results = result["results"]
-                                if isinstance(results, dict) and "message" in results:
-                                    message = results["message"]
-                                    if isinstance(message, dict) and "content" in message:
-                                        content = message["content"]
-                                        hooks = self._extract_hooks_from_content(content)
+            # Standard Langflow shape: direct path lookup
+            content = _known_content(response)
+            if content is not None:
+                hooks = self._extract_hooks_from_content(content)
             
             # Alternative: check for direct content field
             if not hooks and "content" in response:
@@ -168,16 +391,13 @@ class LangflowClient:
         
         # Try to split by common delimiters
         # Check for numbered list (1., 2., etc.)
-        import re
-        numbered_pattern = r'\d+[\.\)]\s*(.+?)(?=\d+[\.\)]|$)'
-        matches = re.findall(numbered_pattern, content, re.DOTALL)
+        matches = NUMBERED_PATTERN.findall(content)
         if matches:
             hooks = [match.strip() for match in matches if match.strip()]
         
         # Check for bullet points (-, *, •)
         if not hooks:
-            bullet_pattern = r'[-*•]\s*(.+?)(?=[-*•]|$)'
-            matches = re.findall(bullet_pattern, content, re.DOTALL)
+            matches = BULLET_PATTERN.findall(content)
             if matches:
                 hooks = [match.strip() for match in matches if match.strip()]
         
@@ -0,0 +1,148 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+Entries are keyed on a hash of model name, temperature, node and rendered prompt and
+stored in a local SQLite file, with LRU + TTL eviction and a cap on the number of entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from config import Config
+
+
+class LLMCache:
+    """SQLite-backed response cache shared by every agent node in the process."""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file to store entries in (":memory:" for a throwaway cache)
+            max_entries: Least recently used entries beyond this count are evicted
+            ttl_seconds: Entries older than this are treated as misses (None = never expire)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                response TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, temperature: Any, node: str, prompt: str) -> str:
+        """Content address for one LLM request."""
+        payload = json.dumps([model, temperature, node, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, node: str, field: str):
+        node_stats = self._stats.setdefault(node, {"hits": 0, "misses": 0})
+        node_stats[field] += 1
+
+    def get(self, key: str, node: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            {"content": str, "metadata": dict} on a hit, None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, metadata, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self._count(node, "misses")
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(node, "hits")
+        return {"content": row[0], "metadata": json.loads(row[1])}
+
+    def set(self, key: str, node: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store a response and evict the least recently used entries over the cap."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, node, response, metadata, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, node, content, json.dumps(metadata or {}, default=str), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, overall and per node."""
+        with self._lock:
+            by_node = {node: dict(counts) for node, counts in self._stats.items()}
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "hits": sum(c["hits"] for c in by_node.values()),
+            "misses": sum(c["misses"] for c in by_node.values()),
+            "entries": entries,
+            "by_node": by_node,
+        }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    Config.LLM_CACHE_PATH,
+                    max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+                    ttl_seconds=Config.LLM_CACHE_TTL_SECONDS or None,
+                )
+    return _cache
+
+
+def is_cacheable(node: str) -> bool:
+    """Whether responses for this graph node may be served from / stored in the cache."""
+    return Config.LLM_CACHE_ENABLED and node not in Config.LLM_CACHE_BYPASS_NODES
@@ -0,0 +1,139 @@
+"""
+Record/replay of model calls for offline runs and benchmarks.
+With LLM_RECORD_PATH set, every model response is appended to that cassette (a JSON-lines
+file) together with its node, prompt, token usage and latency. The "replay" backend
+(LLM_MODEL=replay:<cassette>) answers each prompt with the response recorded for it,
+optionally after a simulated latency, so the whole chain runs without a network or key.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_record_lock = threading.Lock()
+
+
+class CassetteMiss(KeyError):
+    """The replayed cassette has no response for a prompt (re-record it after prompt changes)."""
+
+
+def prompt_key(prompt: str) -> str:
+    """Address of a prompt in a cassette."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def record_call(path: str, node: str, prompt: str, response: Any, seconds: float):
+    """Append one model response to the cassette at `path`."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    metadata = getattr(response, "response_metadata", None) or {}
+    entry = {
+        "key": prompt_key(prompt),
+        "node": node,
+        "prompt": prompt,
+        "response": response.content,
+        "usage": {k: usage.get(k, 0) for k in ("input_tokens", "output_tokens", "total_tokens")},
+        "finish_reason": str(metadata.get("finish_reason", "")),
+        "seconds": round(seconds, 4),
+    }
+    with _record_lock:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_cassette(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Recorded entries grouped by prompt key, in recording order."""
+    entries: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault(entry["key"], []).append(entry)
+    return entries
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that plays back a cassette.
+
+    A prompt recorded several times gets its responses in recording order, cycling when
+    replayed more often. `latency` simulates response time: "none", "recorded" (the
+    recorded seconds), "fixed:<seconds>" or "lognormal:<median>,<sigma>" (seeded, so
+    repeated benchmark runs draw the same delays).
+    """
+
+    path: str
+    latency: str = "none"
+    seed: int = 0
+    entries: Dict[str, List[Dict[str, Any]]] = {}
+    replayed: Dict[str, int] = {}
+    rng: Any = None
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.entries = load_cassette(self.path)
+        self.replayed = {}
+        self.rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _next_entry(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        prompt = messages[-1].content if messages else ""
+        key = prompt_key(prompt)
+        with _record_lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded response for prompt {key[:12]} in {self.path}: {prompt[:80]!r}")
+            index = self.replayed.get(key, 0)
+            self.replayed[key] = index + 1
+            return recorded[index % len(recorded)]
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        kind, _, args = self.latency.partition(":")
+        if kind == "recorded":
+            return entry.get("seconds", 0.0)
+        if kind == "fixed":
+            return float(args)
+        if kind == "lognormal":
+            median, sigma = (float(a) for a in args.split(","))
+            with _record_lock:
+                return median * math.exp(self.rng.gauss(0, sigma))
+        return 0.0
+
+    @staticmethod
+    def _result(entry: Dict[str, Any]) -> ChatResult:
+        message = AIMessage(
+            content=entry["response"],
+            response_metadata={"finish_reason": entry.get("finish_reason", "")},
+            usage_metadata=entry.get("usage") or {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        entry = self._next_entry(messages)
+        delay = self._delay(entry)
+        if delay:
+            time.sleep(delay)
+        return self._result(entry)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        entry = self._next_entry(messages)
+        delay = self._delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(entry)
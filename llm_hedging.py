@@ -0,0 +1,257 @@
+"""
+Per-node timeout/retry budgets and hedged requests for model calls.
+Each attempt is bounded by the node's timeout and retried on transient errors (timeouts,
+5xx) up to the node's retry budget. For short idempotent nodes, a duplicate request is fired
+when the first hasn't answered by the node's observed p95 latency, and whichever answers
+first wins. Duplicates are capped at a fraction of all hedge-eligible calls.
+"""
+
+import asyncio
+import contextvars
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import Config
+from llm_scheduler import get_scheduler, is_rate_limit_error
+import metrics
+
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+# google.api_core / google-genai, openai and httpx/requests timeout and server-error types,
+# matched by name (on the class or a base class) so neither client has to be installed
+TRANSIENT_ERROR_TYPES = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+                         "BadGateway", "ServerError", "APITimeoutError", "APIConnectionError",
+                         "TimeoutException", "Timeout"}
+# Fallback for errors that carry no type or code: a message that starts with the status code
+TRANSIENT_MESSAGE = re.compile(r"^\s*50[0234]\b")
+
+# Hedging needs this many latency samples for a node before it starts
+MIN_SAMPLES = 20
+
+_latencies: Dict[str, deque] = {}
+_budget = {"calls": 0, "hedges": 0}
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def node_timeout(node: str) -> float:
+    """Seconds a single model request for `node` may take."""
+    return Config.LLM_NODE_TIMEOUTS.get(node, Config.REQUEST_TIMEOUT)
+
+
+def node_retries(node: str) -> int:
+    """Retries after a transient error for `node` (quota errors are retried by the scheduler)."""
+    return Config.LLM_NODE_RETRIES.get(node, Config.LLM_RETRIES)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    True for timeouts and server-side errors worth retrying.
+
+    Decided by exception type and HTTP status code; the message only counts when it starts
+    with a 5xx code, so a 400 that happens to mention "500" or "internal" is not retried.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if is_rate_limit_error(exc):
+        return False
+    for attr in ("code", "status_code", "status"):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int):
+            return status in TRANSIENT_STATUS_CODES
+    if any(cls.__name__ in TRANSIENT_ERROR_TYPES for cls in type(exc).__mro__):
+        return True
+    return bool(TRANSIENT_MESSAGE.match(str(exc)))
+
+
+def hedge_delay(node: str) -> Optional[float]:
+    """The node's observed p95 (LLM_HEDGE_QUANTILE) latency, or None if hedging doesn't apply."""
+    if not Config.LLM_HEDGE_ENABLED or node not in Config.LLM_HEDGE_NODES:
+        return None
+    with _lock:
+        samples = list(_latencies.get(node, ()))
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return metrics.percentile(samples, Config.LLM_HEDGE_QUANTILE)
+
+
+def _observe(node: str, seconds: float):
+    with _lock:
+        _latencies.setdefault(node, deque(maxlen=Config.METRICS_WINDOW)).append(seconds)
+
+
+def _take_hedge() -> bool:
+    """Spend one duplicate request if the budget allows it."""
+    with _lock:
+        if _budget["hedges"] + 1 > Config.LLM_HEDGE_MAX_FRACTION * _budget["calls"]:
+            return False
+        _budget["hedges"] += 1
+        return True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(4, Config.LLM_MAX_CONCURRENCY * 4),
+                                               thread_name_prefix="llm-hedge")
+    return _executor
+
+
+def get_hedge_stats() -> Dict[str, Any]:
+    """Hedge-eligible calls and duplicates sent so far in this process."""
+    with _lock:
+        return dict(_budget)
+
+
+def reset():
+    """Forget latency samples and the hedge budget."""
+    with _lock:
+        _latencies.clear()
+        _budget.update(calls=0, hedges=0)
+
+
+def _hedged(node: str, delay: float, scheduled: Callable[[threading.Event, bool], Tuple[Any, int]]):
+    """Run the primary attempt, and a duplicate if it's still going after `delay` seconds."""
+    with _lock:
+        _budget["calls"] += 1
+    cancelled = threading.Event()
+    executor = _get_executor()
+    # Attempts run on the hedge pool in a copy of the caller's context (graph config, stream writer)
+    primary = executor.submit(contextvars.copy_context().run, scheduled, cancelled, True)
+    done, _ = wait([primary], timeout=delay)
+    if done or not _take_hedge():
+        try:
+            return primary.result()
+        finally:
+            cancelled.set()
+
+    metrics.REGISTRY.inc("llm_hedges_total", node=node)
+    hedge = executor.submit(contextvars.copy_context().run, scheduled, cancelled, False)
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.REGISTRY.inc("llm_hedge_wins_total", node=node)
+                    return future.result()
+        # Both failed: surface the primary's error
+        return primary.result()
+    finally:
+        # The slower attempt stops streaming; its answer is discarded
+        cancelled.set()
+
+
+async def _ahedged(node: str, delay: float, scheduled: Callable[[bool], Awaitable[Tuple[Any, int]]]):
+    """_hedged for coroutines; the losing attempt is cancelled rather than left running."""
+    with _lock:
+        _budget["calls"] += 1
+    primary = asyncio.ensure_future(scheduled(True))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not _take_hedge():
+        return await primary
+
+    metrics.REGISTRY.inc("llm_hedges_total", node=node)
+    hedge = asyncio.ensure_future(scheduled(False))
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        metrics.REGISTRY.inc("llm_hedge_wins_total", node=node)
+                    return task.result()
+        # Both failed: surface the primary's error
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if not task.done():
+                task.cancel()
+
+
+def call_with_budget(node: str, attempt: Callable[[float, threading.Event, bool], Any],
+                     priority: str = "interactive", estimated_tokens: int = 0,
+                     usage: Callable[[Any], int] = None) -> Tuple[Any, int]:
+    """
+    Make a model call for `node` through the scheduler, within the node's budgets.
+
+    Args:
+        node: Graph node the call is made for
+        attempt: attempt(timeout, cancelled, primary) performs one request. `cancelled` is set
+            once another attempt has won; `primary` is False for a hedged duplicate (which
+            should not stream tokens to the UI)
+        priority, estimated_tokens, usage: Passed to the scheduler
+
+    Returns:
+        (result, number of retries including quota retries)
+    """
+    timeout = node_timeout(node)
+    scheduler = get_scheduler()
+
+    def scheduled(cancelled: threading.Event, primary: bool) -> Tuple[Any, int]:
+        return scheduler.run(lambda: attempt(timeout, cancelled, primary), priority=priority,
+                             estimated_tokens=estimated_tokens, usage=usage)
+
+    retries = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            delay = hedge_delay(node)
+            if delay is None:
+                result, quota_retries = scheduled(threading.Event(), True)
+            else:
+                result, quota_retries = _hedged(node, delay, scheduled)
+        except Exception as exc:
+            if not is_transient_error(exc) or retries >= node_retries(node):
+                raise
+            retries += 1
+            metrics.REGISTRY.inc("llm_transient_retries_total", node=node)
+            print(f"Model call for {node} failed ({type(exc).__name__}), retrying ({retries}/{node_retries(node)})...")
+            time.sleep(Config.LLM_BACKOFF_SECONDS * (0.5 + random.random() / 2))
+            continue
+        _observe(node, time.perf_counter() - start)
+        return result, retries + quota_retries
+
+
+async def acall_with_budget(node: str, attempt: Callable[[float, bool], Awaitable[Any]],
+                            priority: str = "interactive", estimated_tokens: int = 0,
+                            usage: Callable[[Any], int] = None) -> Tuple[Any, int]:
+    """
+    Async call_with_budget: attempt(timeout, primary) returns a coroutine making one request.
+
+    A losing hedged attempt is cancelled, so it needs no `cancelled` event.
+    """
+    timeout = node_timeout(node)
+    scheduler = get_scheduler()
+
+    def scheduled(primary: bool) -> Awaitable[Tuple[Any, int]]:
+        return scheduler.arun(lambda: attempt(timeout, primary), priority=priority,
+                              estimated_tokens=estimated_tokens, usage=usage)
+
+    retries = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            delay = hedge_delay(node)
+            if delay is None:
+                result, quota_retries = await scheduled(True)
+            else:
+                result, quota_retries = await _ahedged(node, delay, scheduled)
+        except Exception as exc:
+            if not is_transient_error(exc) or retries >= node_retries(node):
+                raise
+            retries += 1
+            metrics.REGISTRY.inc("llm_transient_retries_total", node=node)
+            print(f"Model call for {node} failed ({type(exc).__name__}), retrying ({retries}/{node_retries(node)})...")
+            await asyncio.sleep(Config.LLM_BACKOFF_SECONDS * (0.5 + random.random() / 2))
+            continue
+        _observe(node, time.perf_counter() - start)
+        return result, retries + quota_retries
@@ -0,0 +1,121 @@
+"""
+Per-node generation profiles and pluggable chat model backends.
+A profile (backend, model, temperature, max output tokens, timeout) is resolved for each
+graph node from Config, so short persona reactions can run on a faster model or a local
+OpenAI-compatible server while the finalizer keeps the pro model. Backends are factories
+registered by name; "google" (Gemini), "openai" (any OpenAI-compatible endpoint) and
+"replay" (a recorded cassette, see llm_cassettes) are built in, and others can be added
+with register_backend().
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import Config
+from llm_hedging import node_timeout
+
+# USD per million (input, output) tokens; LLM_PRICES overrides or extends these
+DEFAULT_PRICES = {
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# finish_reason values meaning the answer was cut off at the output token limit
+TRUNCATED_FINISH_REASONS = ("MAX_TOKENS", "LENGTH")
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """How one node's requests are generated; also the key models are cached under."""
+
+    backend: str
+    model: str
+    temperature: float
+    max_output_tokens: int
+    timeout: float
+
+
+def _google(profile: GenerationProfile):
+    # Imported here: the Gemini client takes over a second to import
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=profile.model,
+        google_api_key=Config.GEMINI_API_KEY,
+        temperature=profile.temperature,
+        max_output_tokens=profile.max_output_tokens,
+        timeout=profile.timeout,
+        # Quota errors are retried by llm_scheduler so every session backs off together
+        max_retries=0
+    )
+
+
+def _openai(profile: GenerationProfile):
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError as e:
+        raise ImportError("The 'openai' backend needs langchain-openai: pip install langchain-openai") from e
+    return ChatOpenAI(
+        model=profile.model,
+        base_url=Config.OPENAI_BASE_URL or None,
+        # Local servers usually ignore the key but the client requires one
+        api_key=Config.OPENAI_API_KEY or "not-needed",
+        temperature=profile.temperature,
+        max_tokens=profile.max_output_tokens,
+        timeout=profile.timeout,
+        max_retries=0
+    )
+
+
+def _replay(profile: GenerationProfile):
+    # The "model" of a replay profile is the cassette file
+    from llm_cassettes import ReplayChatModel
+    return ReplayChatModel(path=profile.model, latency=Config.LLM_REPLAY_LATENCY)
+
+
+BACKENDS: Dict[str, Callable[[GenerationProfile], Any]] = {"google": _google, "openai": _openai, "replay": _replay}
+
+
+def register_backend(name: str, factory: Callable[[GenerationProfile], Any]):
+    """Make `name:<model>` usable in LLM_MODEL / LLM_NODE_MODELS; factory(profile) returns a chat model."""
+    BACKENDS[name] = factory
+
+
+def parse_model(spec: str) -> Tuple[str, str]:
+    """Split "backend:model" ("openai:llama3.1:8b"); a spec without a known backend is a Gemini model."""
+    backend, _, model = spec.partition(":")
+    if model and backend in BACKENDS:
+        return backend, model
+    return "google", spec
+
+
+def generation_profile(node: Optional[str] = None) -> GenerationProfile:
+    """The profile for `node` (the defaults when node is None or has no overrides)."""
+    backend, model = parse_model(Config.LLM_NODE_MODELS.get(node, Config.LLM_MODEL))
+    return GenerationProfile(
+        backend=backend,
+        model=model,
+        temperature=Config.LLM_NODE_TEMPERATURES.get(node, Config.LLM_TEMPERATURE),
+        max_output_tokens=Config.LLM_NODE_MAX_TOKENS.get(node, Config.LLM_MAX_OUTPUT_TOKENS),
+        timeout=node_timeout(node) if node else Config.REQUEST_TIMEOUT,
+    )
+
+
+def create_model(profile: GenerationProfile):
+    """Build a chat model for `profile` with its backend's factory."""
+    if profile.backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{profile.backend}' (known: {', '.join(sorted(BACKENDS))})")
+    return BACKENDS[profile.backend](profile)
+
+
+def is_truncated(response: Any) -> bool:
+    """True when the model stopped because it hit the output token limit."""
+    metadata = getattr(response, "response_metadata", None) or {}
+    reason = str(metadata.get("finish_reason", "")).upper()
+    return any(reason.endswith(marker) for marker in TRUNCATED_FINISH_REASONS)
+
+
+def call_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """USD cost of one call at the model's list price (0 for unknown or local models)."""
+    price_in, price_out = Config.LLM_PRICES.get(model) or DEFAULT_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
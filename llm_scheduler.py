@@ -0,0 +1,321 @@
+"""
+Process-wide scheduler in front of the chat model.
+Every LLM call from every session waits here for a slot: requests/min and tokens/min token
+buckets, a concurrency limit that halves on quota errors (429) and creeps back up on
+success, and a priority queue so interactive runs are served before batch jobs.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import Config
+import metrics
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+RATE_LIMIT_MARKERS = ("429", "RESOURCE_EXHAUSTED", "rate limit", "quota")
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True for quota/429 errors from the Gemini client (or any client exposing a 429 status)."""
+    for attr in ("code", "status_code", "status"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    if type(exc).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+    message = str(exc)
+    return any(marker.lower() in message.lower() for marker in RATE_LIMIT_MARKERS)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 when unlimited or available now)."""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(now)
+        # A single request larger than the bucket only waits for a full bucket
+        needed = min(amount, self.per_minute)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) * 60 / self.per_minute
+
+    def take(self, amount: float):
+        """Remove `amount` tokens; may go negative when a call used more than estimated."""
+        if self.per_minute > 0:
+            self.tokens -= amount
+
+
+class LLMScheduler:
+    """
+    Admission control for model calls shared by every thread in the process.
+
+    run() (or arun() from a coroutine) waits until the caller is at the head of the queue for
+    its priority, a concurrency slot is free and both buckets have room, then makes the call. Quota errors halve the
+    concurrency limit, pause admissions with exponential backoff and retry the call; every
+    `limit` consecutive successes raise the limit by one again (AIMD).
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 8, max_retries: int = 5, backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._limit = self.max_concurrency
+        self._successes = 0
+        self._consecutive_limits = 0
+        self._paused_until = 0.0
+        self._rate_limited = 0
+        # ticket -> (event loop, asyncio.Event) of every coroutine waiting in _aacquire
+        self._async_waiters: Dict[tuple, tuple] = {}
+
+    def _queue_depth(self, priority: Optional[int] = None) -> int:
+        return sum(1 for p, _ in self._queue if priority is None or p == priority)
+
+    def _publish_depth(self):
+        for name, priority in PRIORITIES.items():
+            metrics.REGISTRY.set_gauge("llm_queue_depth", self._queue_depth(priority), priority=name)
+        metrics.REGISTRY.set_gauge("llm_in_flight", self._in_flight)
+        metrics.REGISTRY.set_gauge("llm_concurrency_limit", self._limit)
+
+    def _notify(self):
+        """
+        Wake waiting threads, and the coroutine at the head of the queue (called with the lock held).
+
+        Only the head can be admitted, so waking one coroutine avoids a thundering herd when
+        hundreds of runs are waiting on the same event loop.
+        """
+        self._cond.notify_all()
+        waiter = self._async_waiters.get(self._queue[0]) if self._queue else None
+        if waiter is not None:
+            loop, wakeup = waiter
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The waiter's event loop has been closed
+                pass
+
+    def _enqueue(self, priority: str) -> tuple:
+        ticket = (PRIORITIES.get(priority, PRIORITIES["batch"]), next(self._seq))
+        heapq.heappush(self._queue, ticket)
+        self._publish_depth()
+        return ticket
+
+    def _admission_delay(self, ticket: tuple, estimated_tokens: int) -> Optional[float]:
+        """
+        Seconds until `ticket` can be admitted: 0 for now, or None when it has to wait for
+        another call to be admitted or to finish first.
+        """
+        if self._queue[0] != ticket or self._in_flight >= self._limit:
+            return None
+        now = time.monotonic()
+        return max(
+            0.0,
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(estimated_tokens, now),
+        )
+
+    def _admit(self, ticket: tuple, estimated_tokens: int):
+        heapq.heappop(self._queue)
+        self._in_flight += 1
+        self.requests.take(1)
+        self.tokens.take(estimated_tokens)
+        self._publish_depth()
+        # The next waiter may be admissible right away
+        self._notify()
+
+    def _abandon(self, ticket: tuple):
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._publish_depth()
+        self._notify()
+
+    def _acquire(self, priority: str, estimated_tokens: int):
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    delay = self._admission_delay(ticket, estimated_tokens)
+                    if delay == 0:
+                        break
+                    self._cond.wait(delay)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+            self._admit(ticket, estimated_tokens)
+        metrics.REGISTRY.observe("queue_wait", priority, time.monotonic() - start)
+
+    async def _aacquire(self, priority: str, estimated_tokens: int):
+        """_acquire for coroutines: waits on the event loop instead of blocking a thread."""
+        start = time.monotonic()
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            ticket = self._enqueue(priority)
+            self._async_waiters[ticket] = waiter
+        try:
+            while True:
+                with self._cond:
+                    delay = self._admission_delay(ticket, estimated_tokens)
+                    if delay == 0:
+                        self._admit(ticket, estimated_tokens)
+                        break
+                    # Cleared under the lock, so a release right after this can't be missed
+                    waiter[1].clear()
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                if ticket in self._queue:
+                    self._abandon(ticket)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.pop(ticket, None)
+        metrics.REGISTRY.observe("queue_wait", priority, time.monotonic() - start)
+
+    def _release(self, rate_limited: bool, extra_tokens: int = 0):
+        with self._cond:
+            self._in_flight -= 1
+            self.tokens.take(extra_tokens)
+            if rate_limited:
+                self._rate_limited += 1
+                self._consecutive_limits += 1
+                self._successes = 0
+                self._limit = max(1, self._limit // 2)
+                backoff = min(self.max_backoff_seconds,
+                              self.backoff_seconds * 2 ** (self._consecutive_limits - 1))
+                backoff *= 0.5 + random.random() / 2
+                self._paused_until = max(self._paused_until, time.monotonic() + backoff)
+            else:
+                self._consecutive_limits = 0
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.max_concurrency:
+                    self._limit += 1
+                    self._successes = 0
+            self._publish_depth()
+            self._notify()
+
+    def _should_retry(self, exc: Exception, retries: int, priority: str) -> bool:
+        """Release the slot after a failed call; True if it was a quota error worth retrying."""
+        limited = is_rate_limit_error(exc)
+        self._release(limited)
+        if not limited or retries >= self.max_retries:
+            return False
+        metrics.REGISTRY.inc("llm_rate_limited_total", priority=priority)
+        print(f"Model quota hit, backing off (retry {retries + 1}/{self.max_retries})...")
+        return True
+
+    def _succeeded(self, result: Any, estimated_tokens: int, usage: Optional[Callable[[Any], int]]):
+        used = usage(result) if usage is not None else 0
+        self._release(False, max(0, used - estimated_tokens) if used else 0)
+
+    def run(self, call: Callable[[], Any], priority: str = "interactive",
+            estimated_tokens: int = 0, usage: Callable[[Any], int] = None) -> Tuple[Any, int]:
+        """
+        Make `call()` once admitted, retrying quota errors up to max_retries times.
+
+        Args:
+            call: Zero-argument function that performs the model request
+            priority: "interactive" or "batch"
+            estimated_tokens: Tokens reserved from the tokens/min bucket before the call
+            usage: Optional function returning the tokens the result actually used; the
+                difference to the estimate is charged to the bucket afterwards
+
+        Returns:
+            (result, number of retries)
+        """
+        retries = 0
+        while True:
+            self._acquire(priority, estimated_tokens)
+            try:
+                result = call()
+            except Exception as exc:
+                if not self._should_retry(exc, retries, priority):
+                    raise
+                retries += 1
+                continue
+            except BaseException:
+                self._release(False)
+                raise
+            self._succeeded(result, estimated_tokens, usage)
+            return result, retries
+
+    async def arun(self, call: Callable[[], Awaitable[Any]], priority: str = "interactive",
+                   estimated_tokens: int = 0, usage: Callable[[Any], int] = None) -> Tuple[Any, int]:
+        """Async run(): `call()` returns a coroutine, and waiting for a slot doesn't block the event loop."""
+        retries = 0
+        while True:
+            await self._aacquire(priority, estimated_tokens)
+            try:
+                result = await call()
+            except Exception as exc:
+                if not self._should_retry(exc, retries, priority):
+                    raise
+                retries += 1
+                continue
+            except BaseException:
+                # Cancelled (e.g. the losing side of a hedged request)
+                self._release(False)
+                raise
+            self._succeeded(result, estimated_tokens, usage)
+            return result, retries
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth per priority, slots in use and the adaptive limit."""
+        with self._cond:
+            return {
+                "queue_depth": {name: self._queue_depth(p) for name, p in PRIORITIES.items()},
+                "in_flight": self._in_flight,
+                "concurrency_limit": self._limit,
+                "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+                "rate_limited": self._rate_limited,
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler, configured from Config on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    requests_per_minute=Config.LLM_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE,
+                    max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                    max_retries=Config.LLM_RATE_LIMIT_RETRIES,
+                    backoff_seconds=Config.LLM_BACKOFF_SECONDS,
+                )
+    return _scheduler
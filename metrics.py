@@ -0,0 +1,290 @@
+"""
+Per-node and per-LLM-call instrumentation for the hook chain.
+Records wall time, token usage, cache hits and retries as spans, keeps a rolling window of
+latencies for p50/p95 reporting, and exports everything as Prometheus text or JSON lines.
+"""
+
+import inspect
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, List, Optional
+
+from config import Config
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a list of numbers; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class RunMetrics:
+    """Spans recorded during one workflow run."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.iteration = 0
+        self.iteration_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start_iteration(self):
+        with self._lock:
+            self.iteration += 1
+            self.iteration_started = time.perf_counter()
+
+    def add(self, span: Dict[str, Any]):
+        with self._lock:
+            span["iteration"] = self.iteration
+            self.spans.append(span)
+
+    def spent(self) -> Dict[str, float]:
+        """Model calls and tokens used so far (cache hits are free) and seconds since the run started."""
+        with self._lock:
+            calls = [s for s in self.spans if s["kind"] == "llm" and not s["cache_hit"]]
+        return {
+            "llm_calls": len(calls),
+            "tokens": sum(s["input_tokens"] + s["output_tokens"] for s in calls),
+            "seconds": time.perf_counter() - self.started_at,
+        }
+
+    @staticmethod
+    def _summarize(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        llm_spans = [s for s in spans if s["kind"] == "llm"]
+        nodes: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            node = nodes.setdefault(span["node"], {"seconds": 0.0, "llm_calls": 0, "llm_seconds": 0.0, "cost_usd": 0.0})
+            if span["kind"] == "node":
+                node["seconds"] = round(node["seconds"] + span["seconds"], 4)
+            else:
+                node["llm_calls"] += 1
+                node["llm_seconds"] = round(node["llm_seconds"] + span["seconds"], 4)
+                node["cost_usd"] = round(node["cost_usd"] + span["cost_usd"], 6)
+                if span["model"]:
+                    node["model"] = span["model"]
+        return {
+            "llm_calls": len(llm_spans),
+            "input_tokens": sum(s["input_tokens"] for s in llm_spans),
+            "output_tokens": sum(s["output_tokens"] for s in llm_spans),
+            "cache_hits": sum(1 for s in llm_spans if s["cache_hit"]),
+            "retries": sum(s["retries"] for s in llm_spans),
+            "cost_usd": round(sum(s["cost_usd"] for s in llm_spans), 6),
+            "nodes": nodes,
+        }
+
+    def close_iteration(self) -> Dict[str, Any]:
+        """
+        Summary of the current iteration, called when its history entry is written.
+
+        The node writing the entry is still running, so its own node span is not included
+        yet (its LLM calls are); summary() has the complete per-iteration breakdown.
+        """
+        with self._lock:
+            spans = [s for s in self.spans if s["iteration"] == self.iteration]
+        summary = self._summarize(spans)
+        if self.iteration_started is not None:
+            summary["seconds"] = round(time.perf_counter() - self.iteration_started, 4)
+            REGISTRY.observe("iteration", "all", summary["seconds"])
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the whole run, plus a breakdown per iteration (the finalizer counts towards the last one)."""
+        with self._lock:
+            spans = list(self.spans)
+        summary = self._summarize(spans)
+        summary["seconds"] = round(time.perf_counter() - self.started_at, 4)
+        iterations = sorted({s["iteration"] for s in spans})
+        summary["iterations"] = {
+            i: self._summarize([s for s in spans if s["iteration"] == i]) for i in iterations
+        }
+        return summary
+
+
+class MetricsRegistry:
+    """Process-wide latency windows and counters, exported for scraping or log shipping."""
+
+    def __init__(self, window: int = 5000):
+        self.window = window
+        self._latencies: Dict[tuple, deque] = {}
+        self._counters: Dict[tuple, float] = {}
+        self._gauges: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._sink_lock = threading.Lock()
+
+    def observe(self, kind: str, node: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault((kind, node), deque(maxlen=self.window)).append(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def record_span(self, span: Dict[str, Any]):
+        self.observe(span["kind"], span["node"], span["seconds"])
+        if span["kind"] == "llm":
+            self.inc("llm_calls_total", node=span["node"])
+            self.inc("llm_input_tokens_total", span["input_tokens"], node=span["node"])
+            self.inc("llm_output_tokens_total", span["output_tokens"], node=span["node"])
+            self.inc("llm_retries_total", span["retries"], node=span["node"])
+            if span["cost_usd"]:
+                self.inc("llm_cost_usd_total", span["cost_usd"], node=span["node"], model=span["model"])
+            if span["cache_hit"]:
+                self.inc("llm_cache_hits_total", node=span["node"])
+        self._write_jsonl(span)
+
+    def _write_jsonl(self, span: Dict[str, Any]):
+        if not Config.METRICS_JSONL_PATH:
+            return
+        with self._sink_lock:
+            with open(Config.METRICS_JSONL_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(span) + "\n")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """p50/p95/count per (kind, node) plus all counters and gauges."""
+        with self._lock:
+            latencies = {key: list(values) for key, values in self._latencies.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            "latency": {
+                f"{kind}:{node}": {
+                    "count": len(values),
+                    "p50": round(percentile(values, 50), 4),
+                    "p95": round(percentile(values, 95), 4),
+                }
+                for (kind, node), values in sorted(latencies.items())
+            },
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(gauges.items())
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the registry in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP hook_chain_latency_seconds Wall time per graph node, LLM call, iteration and scheduler queue wait.",
+            "# TYPE hook_chain_latency_seconds summary",
+        ]
+        for key, stats in snapshot["latency"].items():
+            kind, node = key.split(":", 1)
+            labels = f'kind="{kind}",node="{node}"'
+            lines.append(f'hook_chain_latency_seconds{{{labels},quantile="0.5"}} {stats["p50"]}')
+            lines.append(f'hook_chain_latency_seconds{{{labels},quantile="0.95"}} {stats["p95"]}')
+            lines.append(f"hook_chain_latency_seconds_count{{{labels}}} {stats['count']}")
+
+        seen = set()
+        for metric_type in ("counter", "gauge"):
+            for metric in snapshot[f"{metric_type}s"]:
+                name = f"hook_chain_{metric['name']}"
+                if name not in seen:
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    seen.add(name)
+                labels = ",".join(f'{k}="{v}"' for k, v in metric["labels"].items())
+                lines.append(f"{name}{{{labels}}} {metric['value']:g}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self) -> str:
+        """One JSON object per latency series, counter and gauge."""
+        snapshot = self.snapshot()
+        rows = [{"type": "latency", "series": key, **stats} for key, stats in snapshot["latency"].items()]
+        rows += [{"type": "counter", **counter} for counter in snapshot["counters"]]
+        rows += [{"type": "gauge", **gauge} for gauge in snapshot["gauges"]]
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+REGISTRY = MetricsRegistry(window=Config.METRICS_WINDOW)
+
+
+def current_run() -> Optional[RunMetrics]:
+    """The RunMetrics of the graph run this code is executing in, if any."""
+    try:
+        from langgraph.config import get_config
+        config = get_config()
+    except RuntimeError:
+        return None
+    return config.get("configurable", {}).get("run_metrics")
+
+
+def _record(span: Dict[str, Any]):
+    span["ts"] = time.time()
+    REGISTRY.record_span(span)
+    run = current_run()
+    if run is not None:
+        run.add(span)
+
+
+def record_llm_call(node: str, seconds: float, input_tokens: int = 0, output_tokens: int = 0,
+                    cache_hit: bool = False, retries: int = 0, model: str = "", cost_usd: float = 0.0):
+    """Record one model call (or cache hit) made on behalf of a graph node."""
+    _record({
+        "kind": "llm",
+        "node": node,
+        "seconds": round(seconds, 4),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cache_hit": cache_hit,
+        "retries": retries,
+        "model": model,
+        "cost_usd": cost_usd,
+    })
+
+
+@contextmanager
+def node_span(node: str):
+    """Time a graph node; the span is recorded even if the node raises."""
+    start = time.perf_counter()
+    run = current_run()
+    if run is not None and node == "generate_hook":
+        # Every iteration starts at the generator
+        run.start_iteration()
+    try:
+        yield
+    finally:
+        _record({"kind": "node", "node": node, "seconds": round(time.perf_counter() - start, 4)})
+
+
+def timed_node(node: str, func):
+    """Wrap a graph node function so every call is recorded as a node span."""
+    @wraps(func)
+    def wrapper(state):
+        with node_span(node):
+            return func(state)
+    return wrapper
+
+
+def atimed_node(node: str, func):
+    """timed_node for async graph runs; `func` may be a coroutine function or a plain (non-blocking) one."""
+    @wraps(func)
+    async def wrapper(state):
+        with node_span(node):
+            result = func(state)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+    return wrapper
@@ -0,0 +1,165 @@
+"""
+On-disk store for finished workflow runs.
+Each run is written to a local SQLite file as typed rows: one per run, one per iteration
+and one per persona verdict. Tens of thousands of runs can then be kept for analysis
+(approval rates, persona scores, timings) without holding them in memory.
+
+Usage:
+    python results_store.py            # summary of the runs stored at RESULTS_STORE_PATH
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+# Persona feedback lines look like "**22yo Persona (Neha):** reaction..."
+_FEEDBACK_LINE = re.compile(r"^\*\*(?P<label>.+?):\*\*\s*(?P<reaction>.*)$", re.DOTALL)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        recipe TEXT NOT NULL,
+        hook TEXT NOT NULL,
+        is_approved INTEGER NOT NULL,
+        iterations INTEGER NOT NULL,
+        final_output TEXT NOT NULL,
+        seconds REAL,
+        llm_calls INTEGER,
+        input_tokens INTEGER,
+        output_tokens INTEGER,
+        finished_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS iterations (
+        run_id TEXT NOT NULL,
+        iteration INTEGER NOT NULL,
+        hook TEXT NOT NULL,
+        decision TEXT NOT NULL,
+        is_approved INTEGER NOT NULL,
+        decided_by TEXT NOT NULL,
+        programmatic_feedback TEXT NOT NULL,
+        seconds REAL,
+        llm_calls INTEGER,
+        PRIMARY KEY (run_id, iteration)
+    )""",
+    """CREATE TABLE IF NOT EXISTS persona_verdicts (
+        run_id TEXT NOT NULL,
+        iteration INTEGER NOT NULL,
+        persona TEXT NOT NULL,
+        scroll_stop REAL,
+        share REAL,
+        reaction TEXT NOT NULL,
+        PRIMARY KEY (run_id, iteration, persona)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_runs_finished_at ON runs (finished_at)",
+]
+
+
+def _persona_rows(run_id: str, entry) -> List[tuple]:
+    scores = entry.persona_scores or {}
+    rows = []
+    for line in entry.verifier_feedback:
+        match = _FEEDBACK_LINE.match(line)
+        label, reaction = (match["label"], match["reaction"]) if match else ("", line)
+        score = scores.get(label, {})
+        rows.append((run_id, entry.iteration, label, score.get("scroll_stop"), score.get("share"), reaction))
+    return rows
+
+
+class ResultsStore:
+    """SQLite file of finished runs, safe to share between threads."""
+
+    def __init__(self, path: str):
+        """
+        Open (creating if needed) the store.
+
+        Args:
+            path: SQLite file to write runs to (":memory:" for a throwaway store)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def save_run(self, state: Dict[str, Any]):
+        """Write a finished run (the final state run_workflow returns), replacing an earlier copy."""
+        run_id = state["run_id"]
+        summary = state.get("metrics") or {}
+        history = state.get("history") or []
+        iteration_metrics = [entry.metrics or {} for entry in history]
+        with self._lock, self._conn:
+            for table in ("runs", "iterations", "persona_verdicts"):
+                self._conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            self._conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, state["recipe_description"], state.get("current_hook", ""),
+                 int(bool(state.get("is_approved"))), state.get("iterations", 0), state.get("final_output", ""),
+                 summary.get("seconds"), summary.get("llm_calls"), summary.get("input_tokens"),
+                 summary.get("output_tokens"), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO iterations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, entry.iteration, entry.hook, entry.manager_decision, int(entry.is_approved),
+                  entry.decided_by, entry.programmatic_feedback, m.get("seconds"), m.get("llm_calls"))
+                 for entry, m in zip(history, iteration_metrics)],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO persona_verdicts VALUES (?, ?, ?, ?, ?, ?)",
+                [row for entry in history for row in _persona_rows(run_id, entry)],
+            )
+
+    def query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Run a read query and return the rows as dicts."""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def summary(self) -> Dict[str, Any]:
+        """Run count, approval rate, mean iterations/latency and mean scores per persona."""
+        runs = self.query(
+            "SELECT COUNT(*) AS runs, AVG(is_approved) AS approval_rate, AVG(iterations) AS mean_iterations, "
+            "AVG(seconds) AS mean_seconds, AVG(llm_calls) AS mean_llm_calls FROM runs"
+        )[0]
+        personas = self.query(
+            "SELECT persona, COUNT(*) AS verdicts, AVG(scroll_stop) AS mean_scroll_stop, AVG(share) AS mean_share "
+            "FROM persona_verdicts GROUP BY persona ORDER BY persona"
+        )
+        return {**runs, "personas": personas}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[ResultsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_results_store() -> Optional[ResultsStore]:
+    """Return the process-wide store, or None when RESULTS_STORE_PATH is not set."""
+    global _store
+    if not Config.RESULTS_STORE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultsStore(Config.RESULTS_STORE_PATH)
+    return _store
+
+
+if __name__ == "__main__":
+    store = get_results_store()
+    if store is None:
+        raise SystemExit("Set RESULTS_STORE_PATH to the results database first.")
+    print(json.dumps(store.summary(), indent=2))
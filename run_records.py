@@ -0,0 +1,67 @@
+"""
+Compact records for workflow history.
+Each iteration of a run is one slotted, immutable HistoryEntry. The graph's `history`
+channel is append-only: nodes return just their new entry and LangGraph concatenates it,
+so no node copies the history, and streamed updates carry one entry rather than the
+whole list. Code that merges streamed updates into a state dict uses merge_update().
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, Tuple
+
+# State keys whose updates are appended rather than assigned (see GraphState's reducers)
+APPEND_ONLY_KEYS = ("history",)
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryEntry:
+    """One generator -> gate -> personas -> manager iteration."""
+
+    iteration: int
+    hook: str
+    programmatic_feedback: str
+    manager_decision: str
+    is_approved: bool
+    # "fast_path" or "llm" for manager decisions, "rules" when the rules gate rejected the hook
+    decided_by: str = ""
+    verifier_feedback: Tuple[str, ...] = ()
+    # Persona label -> {"scroll_stop": float, "share": float}
+    persona_scores: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    candidates: Tuple[Dict[str, Any], ...] = ()
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    # Read-only mapping access, so callers written against dict entries keep working
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.__dataclass_fields__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict (lists instead of tuples) for JSON output."""
+        entry = asdict(self)
+        entry["verifier_feedback"] = list(self.verifier_feedback)
+        entry["candidates"] = list(self.candidates)
+        return entry
+
+
+def merge_update(state: Dict[str, Any], update: Dict[str, Any]):
+    """Apply a node's streamed update to `state` in place, appending to append-only keys."""
+    for key, value in update.items():
+        if key in APPEND_ONLY_KEYS:
+            state[key] = list(state.get(key) or []) + list(value or [])
+        else:
+            state[key] = value
+
+
+def json_default(obj: Any) -> Any:
+    """`default=` hook for json.dumps so states containing history records serialize."""
+    if isinstance(obj, HistoryEntry):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
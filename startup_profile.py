@@ -0,0 +1,103 @@
+"""
+Cold-start report for the hook chain.
+Measures, in a fresh interpreter, how long each startup phase takes (importing the chain,
+creating the model client, compiling the workflow) and which imports dominate, using
+Python's -X importtime. Used by the --profile-startup option of batch_cli.py and
+http_server.py.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Imports shown in the report
+TOP_IMPORTS = 10
+
+
+def _measure_phases() -> List[Dict[str, Any]]:
+    """Run each startup phase in this (fresh) process and time it."""
+    phases = []
+
+    def phase(name: str, func):
+        start = time.perf_counter()
+        error = None
+        try:
+            func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+        phases.append({"phase": name, "seconds": round(time.perf_counter() - start, 4), "error": error})
+
+    phase("import config", lambda: __import__("config"))
+    phase("import instagram_hook_chain", lambda: __import__("instagram_hook_chain"))
+    chain = sys.modules.get("instagram_hook_chain")
+    if chain is not None:
+        phase("create model client", chain.get_llm)
+        phase("compile workflow", chain.get_workflow)
+    return phases
+
+
+def _parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Slowest imports made directly by the phases (cumulative, including their own imports)."""
+    imports = []
+    for line in stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        _, cumulative, name = parts
+        # importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if not cumulative.strip().isdigit() or depth > 1:
+            continue
+        imports.append({"module": name.strip(), "seconds": int(cumulative) / 1e6})
+    imports.sort(key=lambda i: i["seconds"], reverse=True)
+    return imports[:TOP_IMPORTS]
+
+
+def profile_startup() -> Dict[str, Any]:
+    """
+    Profile a cold start in a child interpreter.
+
+    Returns:
+        Dictionary with per-phase timings, the total and the slowest imports
+    """
+    code = "import json, startup_profile; print(json.dumps(startup_profile._measure_phases()))"
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        "phases": phases,
+        "total_seconds": round(sum(p["seconds"] for p in phases), 4),
+        "process_seconds": round(wall, 4),
+        "slowest_imports": _parse_importtime(result.stderr),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable version of profile_startup()'s result."""
+    lines = ["Startup profile (fresh interpreter):"]
+    for p in report["phases"]:
+        suffix = f"  [failed: {p['error']}]" if p["error"] else ""
+        lines.append(f"  {p['phase']:<30} {p['seconds'] * 1000:8.1f} ms{suffix}")
+    lines.append(f"  {'total':<30} {report['total_seconds'] * 1000:8.1f} ms "
+                 f"(process incl. interpreter: {report['process_seconds'] * 1000:.0f} ms)")
+    lines.append("Slowest imports (cumulative):")
+    for i in report["slowest_imports"]:
+        lines.append(f"  {i['module']:<40} {i['seconds'] * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def main(output_format: str = "text"):
+    """Print the report as text or one JSON object (for tracking cold start over time)."""
+    report = profile_startup()
+    print(json.dumps(report) if output_format == "json" else format_report(report))
+
+
+if __name__ == "__main__":
+    main("json" if "--json" in sys.argv else "text")
@@ -0,0 +1,55 @@
+"""
+Shared setup for the test suite: the tests run offline, against benchmarks/fake_llm.py and
+benchmarks/langflow_stub.py, so no API key, cache file or checkpoint database is needed.
+"""
+
+import os
+import sys
+from typing import Any, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "offline-test")
+os.environ.update(LLM_CACHE_ENABLED="false", CHECKPOINT_ENABLED="false", RESULTS_STORE_PATH="")
+
+import pytest  # noqa: E402
+
+from benchmarks.fake_llm import DEFAULT_RESPONSES, FakeChatModel  # noqa: E402
+from config import Config  # noqa: E402
+import instagram_hook_chain as chain  # noqa: E402
+
+
+class RecordingChatModel(FakeChatModel):
+    """FakeChatModel that records which agent each call was for, and can fail one agent's calls."""
+
+    agents: list = []
+    fail_agent: Optional[str] = None
+
+    def _respond(self, messages) -> str:
+        prompt = messages[-1].content if messages else ""
+        agent = next((marker for marker in self.responses if marker in prompt), "")
+        self.agents.append(agent)
+        if agent and agent == self.fail_agent:
+            raise ValueError(f"{agent} call failed")
+        return super()._respond(messages)
+
+
+@pytest.fixture
+def fake_chain(monkeypatch):
+    """
+    The workflow module with a fake model serving every node.
+
+    Call the returned function with FakeChatModel settings (and `fail_agent`) to install a new
+    model; the compiled graph is rebuilt for each test so Config changes take effect.
+    """
+    monkeypatch.setattr(Config, "LLM_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", False)
+
+    def install(**settings: Any) -> RecordingChatModel:
+        settings.setdefault("responses", DEFAULT_RESPONSES)
+        model = RecordingChatModel(**settings)
+        monkeypatch.setattr(chain, "llm", model)
+        return model
+
+    chain.clear_registry()
+    yield install
+    chain.clear_registry()
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from checkpoints import open_checkpointer
+
+
+def save(checkpointer, thread_id: str, age: timedelta):
+    checkpoint = empty_checkpoint()
+    checkpoint["ts"] = (datetime.now(timezone.utc) - age).isoformat()
+    checkpointer.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, checkpoint, {}, {})
+
+
+def test_open_prunes_only_stale_runs(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    checkpointer = open_checkpointer(path)
+    save(checkpointer, "abandoned", timedelta(days=3))
+    save(checkpointer, "recent", timedelta(minutes=5))
+    checkpointer.conn.close()
+
+    checkpointer = open_checkpointer(path, max_age_seconds=86400)
+
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "abandoned"}}) is None
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "recent"}}) is not None
+
+
+def test_ttl_zero_keeps_everything(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    save(open_checkpointer(path), "abandoned", timedelta(days=30))
+
+    checkpointer = open_checkpointer(path, max_age_seconds=0)
+
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "abandoned"}}) is not None
@@ -0,0 +1,88 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import http_server
+import instagram_hook_chain
+
+
+@pytest.fixture
+def server():
+    service = http_server.HookService(max_concurrency=2, max_queue=4)
+    server = http_server.serve("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path: str, body: dict):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}",
+                                     data=json.dumps(body).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def failing_workflow(run_ids):
+    def stream_workflow(description, run_id=None, **kwargs):
+        run_ids.append(run_id)
+        raise RuntimeError("manager call failed")
+        yield
+
+    return stream_workflow
+
+
+def test_failed_run_returns_generated_run_id(server, monkeypatch):
+    run_ids = []
+    monkeypatch.setattr(instagram_hook_chain, "stream_workflow", failing_workflow(run_ids))
+
+    status, body = post(server, "/hooks", {"recipe_description": "Crispy garlic butter salmon"})
+
+    assert status == 502
+    assert run_ids[0]
+    assert json.loads(body)["run_id"] == run_ids[0]
+
+
+def test_failed_stream_reports_run_id(server, monkeypatch):
+    run_ids = []
+    monkeypatch.setattr(instagram_hook_chain, "stream_workflow", failing_workflow(run_ids))
+
+    status, body = post(server, "/hooks/stream", {"recipe_description": "Crispy garlic butter salmon",
+                                                   "run_id": "client-run"})
+
+    assert status == 200
+    assert "event: error" in body
+    error = json.loads(body.split("event: error\ndata: ", 1)[1].split("\n", 1)[0])
+    assert error["run_id"] == run_ids[0] == "client-run"
+
+
+def test_identical_descriptions_share_one_run(server, fake_chain):
+    model = fake_chain(latency=0.05)
+    descriptions = ["Crispy garlic butter salmon", "  crispy GARLIC butter salmon ", "Crispy garlic  butter salmon"]
+    responses = [None] * len(descriptions)
+
+    def request(i: int):
+        responses[i] = post(server, "/hooks", {"recipe_description": descriptions[i]})
+
+    first = threading.Thread(target=request, args=(0,))
+    first.start()
+    while model.calls == 0:
+        threading.Event().wait(0.005)
+    others = [threading.Thread(target=request, args=(i,)) for i in (1, 2)]
+    for t in others:
+        t.start()
+    for t in [first, *others]:
+        t.join()
+
+    bodies = [json.loads(body) for status, body in responses if status == 200]
+    assert len(bodies) == 3
+    assert [b["coalesced"] for b in bodies] == [False, True, True]
+    assert len({b["run_id"] for b in bodies}) == 1
+    # One run's worth of calls: generator, three personas, manager, finalizer
+    assert model.calls == 6
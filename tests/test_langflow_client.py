@@ -0,0 +1,56 @@
+import pytest
+import requests
+
+from benchmarks.langflow_stub import StubLangflowServer
+from langflow_client import LangflowClient
+
+
+def test_retries_server_errors_then_parses_hooks():
+    with StubLangflowServer(fail_first=2, fail_status=503) as stub, \
+            LangflowClient(api_url=stub.url, max_retries=3, backoff_seconds=0.0) as client:
+        response = client.generate_hooks("One-pan garlic butter pasta")
+
+    assert stub.requests == 3
+    hooks = client.parse_hooks_response(response)
+    assert hooks[0] == "Garlic first is killing your pasta"
+    assert len(hooks) == 5
+
+
+def test_gives_up_after_max_retries():
+    with StubLangflowServer(fail_first=10, fail_status=503) as stub, \
+            LangflowClient(api_url=stub.url, max_retries=1, backoff_seconds=0.0) as client:
+        with pytest.raises(requests.exceptions.RequestException, match="503"):
+            client.generate_hooks("One-pan garlic butter pasta")
+
+    assert stub.requests == 2
+
+
+def test_client_errors_are_not_retried():
+    with StubLangflowServer(fail_first=10, fail_status=400) as stub, \
+            LangflowClient(api_url=stub.url, max_retries=3, backoff_seconds=0.0) as client:
+        with pytest.raises(requests.exceptions.RequestException, match="400"):
+            client.generate_hooks("One-pan garlic butter pasta")
+
+    assert stub.requests == 1
+
+
+def test_stream_yields_each_hook():
+    with StubLangflowServer() as stub, LangflowClient(api_url=stub.url, backoff_seconds=0.0) as client:
+        hooks = list(client.generate_hooks_stream("One-pan garlic butter pasta"))
+
+    assert hooks[0] == "Garlic first is killing your pasta"
+    assert len(hooks) == 5
+
+
+def test_negative_max_retries_is_rejected():
+    with pytest.raises(ValueError, match="max_retries"):
+        LangflowClient(api_url="http://127.0.0.1:9/api/v1/run", max_retries=-1)
+
+
+def test_zero_retries_makes_one_request():
+    with StubLangflowServer(fail_first=1, fail_status=503) as stub, \
+            LangflowClient(api_url=stub.url, max_retries=0, backoff_seconds=0.0) as client:
+        with pytest.raises(requests.exceptions.RequestException, match="503"):
+            client.generate_hooks("One-pan garlic butter pasta")
+
+    assert stub.requests == 1
@@ -0,0 +1,34 @@
+import pytest
+
+import instagram_hook_chain as chain
+from config import Config
+from llm_cassettes import CassetteMiss, ReplayChatModel
+
+RECIPE = "One-pan garlic butter pasta in 15 minutes"
+
+
+def test_replay_reproduces_recorded_run(fake_chain, monkeypatch, tmp_path):
+    cassette = str(tmp_path / "run.jsonl")
+    monkeypatch.setattr(Config, "LLM_RECORD_PATH", cassette)
+    fake_chain()
+    recorded = chain.run_workflow(RECIPE)
+    monkeypatch.setattr(Config, "LLM_RECORD_PATH", "")
+
+    monkeypatch.setattr(chain, "llm", ReplayChatModel(path=cassette))
+    replayed = chain.run_workflow(RECIPE)
+
+    assert replayed["final_output"] == recorded["final_output"]
+    assert replayed["current_hook"] == recorded["current_hook"]
+    assert replayed["metrics"]["llm_calls"] == recorded["metrics"]["llm_calls"]
+
+
+def test_unrecorded_prompt_is_a_miss(fake_chain, monkeypatch, tmp_path):
+    cassette = str(tmp_path / "run.jsonl")
+    monkeypatch.setattr(Config, "LLM_RECORD_PATH", cassette)
+    fake_chain()
+    chain.run_workflow(RECIPE)
+    monkeypatch.setattr(Config, "LLM_RECORD_PATH", "")
+
+    monkeypatch.setattr(chain, "llm", ReplayChatModel(path=cassette))
+    with pytest.raises(CassetteMiss):
+        chain.run_workflow("Crispy chili oil eggs for breakfast")
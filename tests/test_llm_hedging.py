@@ -0,0 +1,72 @@
+import pytest
+
+import llm_hedging
+from benchmarks.fake_llm import FakeRateLimitError, FakeServerError
+from config import Config
+
+
+class HTTPError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ServiceUnavailable(Exception):
+    """Named like google.api_core.exceptions.ServiceUnavailable."""
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", False)
+    llm_hedging.reset()
+
+
+@pytest.mark.parametrize("exc", [
+    TimeoutError("Deadline of 5s exceeded"),
+    ConnectionResetError("connection reset by peer"),
+    FakeServerError("503 UNAVAILABLE: simulated server error"),
+    HTTPError("Bad Gateway", 502),
+    ServiceUnavailable("The service is currently unavailable."),
+    RuntimeError("500 Internal error encountered."),
+])
+def test_transient_errors(exc):
+    assert llm_hedging.is_transient_error(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    HTTPError("payload exceeds the limit: 50000 bytes", 400),
+    HTTPError("internal field 'x' is not allowed", 400),
+    ValueError("request timeout must be positive, got 500"),
+    RuntimeError("INVALID_ARGUMENT: internal error in template at line 503"),
+    FakeRateLimitError("429 RESOURCE_EXHAUSTED: simulated quota exceeded"),
+])
+def test_permanent_errors(exc):
+    assert not llm_hedging.is_transient_error(exc)
+
+
+def test_400_mentioning_500_is_not_retried(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_RETRIES", 3)
+    calls = []
+
+    def attempt(timeout, cancelled, primary):
+        calls.append(primary)
+        raise HTTPError("payload exceeds the limit: 50000 bytes", 400)
+
+    with pytest.raises(HTTPError):
+        llm_hedging.call_with_budget("verify_personas", attempt)
+    assert len(calls) == 1
+
+
+def test_503_is_retried_within_budget(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_RETRIES", 2)
+    calls = []
+
+    def attempt(timeout, cancelled, primary):
+        calls.append(primary)
+        if len(calls) < 3:
+            raise FakeServerError("503 UNAVAILABLE: simulated server error")
+        return "ok"
+
+    result, retries = llm_hedging.call_with_budget("verify_personas", attempt)
+    assert (result, retries, len(calls)) == ("ok", 2, 3)
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import metrics
+from benchmarks.fake_llm import FakeChatModel, FakeRateLimitError
+from llm_scheduler import LLMScheduler
+
+PROMPT = "PERSONA SIMULATION"
+
+
+@pytest.fixture
+def gauges(monkeypatch):
+    """Every value set on each gauge, as {(name, priority): [values]}."""
+    seen = {}
+    set_gauge = metrics.REGISTRY.set_gauge
+
+    def record(name, value, **labels):
+        seen.setdefault((name, labels.get("priority")), []).append(value)
+        set_gauge(name, value, **labels)
+
+    monkeypatch.setattr(metrics.REGISTRY, "set_gauge", record)
+    return seen
+
+
+def test_backs_off_on_429s_and_records_queue_depth(gauges):
+    model = FakeChatModel(latency=0.02, max_in_flight=2)
+    scheduler = LLMScheduler(max_concurrency=8, max_retries=20, backoff_seconds=0.01)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: scheduler.run(lambda: model.invoke(PROMPT)), range(40)))
+
+    stats = scheduler.stats()
+    assert len(results) == 40
+    assert model.rate_limited > 0
+    assert stats["rate_limited"] == model.rate_limited
+    assert sum(retries for _, retries in results) == model.rate_limited
+    # The limit was halved below the configured 8 and the queue was visible while it drained
+    assert min(gauges[("llm_concurrency_limit", None)]) < 8
+    assert max(gauges[("llm_queue_depth", "interactive")]) > 0
+    assert stats["queue_depth"]["interactive"] == 0 and stats["in_flight"] == 0
+
+
+def test_gives_up_after_max_retries():
+    model = FakeChatModel(rate_limit_first=10)
+    scheduler = LLMScheduler(max_concurrency=2, max_retries=2, backoff_seconds=0.0)
+
+    with pytest.raises(FakeRateLimitError):
+        scheduler.run(lambda: model.invoke(PROMPT))
+    assert model.calls == 3
+
+
+def test_limit_recovers_after_successes():
+    model = FakeChatModel(rate_limit_first=1)
+    scheduler = LLMScheduler(max_concurrency=4, max_retries=3, backoff_seconds=0.0)
+
+    scheduler.run(lambda: model.invoke(PROMPT))
+    assert scheduler.stats()["concurrency_limit"] == 2
+    for _ in range(10):
+        scheduler.run(lambda: model.invoke(PROMPT))
+    assert scheduler.stats()["concurrency_limit"] == 4
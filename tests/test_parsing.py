@@ -0,0 +1,60 @@
+from instagram_hook_chain import _parse_candidates, _split_persona_scores
+
+
+def test_candidates_from_json():
+    text = '```json\n{"hooks": [{"hook": "Stop salting pasta water"}, {"hook": "Garlic goes last"}]}\n```'
+    assert _parse_candidates(text, 3) == ["Stop salting pasta water", "Garlic goes last"]
+
+
+def test_candidates_skip_preamble_before_list():
+    text = ("Here are three hooks for your recipe:\n"
+            "1. Stop salting pasta water\n2. Garlic goes last\n3. Your pan is too cold")
+    assert _parse_candidates(text, 3) == ["Stop salting pasta water", "Garlic goes last", "Your pan is too cold"]
+
+
+def test_candidates_from_bullets_after_trailing_text():
+    text = "- Stop salting pasta water\n- Garlic goes last\n\nWant more options?"
+    assert _parse_candidates(text, 3) == ["Stop salting pasta water", "Garlic goes last"]
+
+
+def test_candidates_from_bare_lines_without_markers():
+    text = "Stop salting pasta water\n\nGarlic goes last\nStop salting pasta water"
+    assert _parse_candidates(text, 3) == ["Stop salting pasta water", "Garlic goes last"]
+
+
+def test_candidates_capped_at_n():
+    text = "1. One\n2. Two\n3. Three"
+    assert _parse_candidates(text, 2) == ["One", "Two"]
+
+
+def test_scores_split_from_reaction():
+    text, scores = _split_persona_scores("I'd send this to my roommate.\nSCORES: scroll_stop=8 share=7")
+    assert text == "I'd send this to my roommate."
+    assert scores == {"scroll_stop": 8.0, "share": 7.0}
+
+
+def test_scores_with_markdown_and_out_of_ten():
+    text, scores = _split_persona_scores("Meh.\n**SCORES:** Scroll-stop: 4/10, Share: 2.5/10")
+    assert text == "Meh."
+    assert scores == {"scroll_stop": 4.0, "share": 2.5}
+
+
+def test_scores_clamped_to_ten():
+    _, scores = _split_persona_scores("Wow!\nSCORES: scroll_stop=12 share=7")
+    assert scores["scroll_stop"] == 10.0
+
+
+def test_list_marker_before_scores_is_dropped():
+    text, _ = _split_persona_scores("1. Love it, saving this.\n2. SCORES: scroll_stop=8 share=7")
+    assert text == "1. Love it, saving this."
+
+
+def test_numbers_ending_the_reaction_are_kept():
+    text, _ = _split_persona_scores("Easily in my top 5.\nSCORES: scroll_stop=9 share=8")
+    assert text == "Easily in my top 5."
+    text, _ = _split_persona_scores("Honestly (it's a 10)\nSCORES: scroll_stop=9 share=9")
+    assert text == "Honestly (it's a 10)"
+
+
+def test_reaction_without_scores():
+    assert _split_persona_scores("  Not for me.  ") == ("Not for me.", None)
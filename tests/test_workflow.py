@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+import instagram_hook_chain as chain
+from config import Config
+
+RECIPE = "One-pan garlic butter pasta in 15 minutes"
+
+
+def run(engine: str, recipe: str, **kwargs):
+    if engine == "async":
+        return asyncio.run(chain.arun_workflow(recipe, **kwargs))
+    return chain.run_workflow(recipe, **kwargs)
+
+
+@pytest.mark.parametrize("engine", ["sync", "async"])
+def test_run_makes_one_call_per_agent(fake_chain, engine):
+    model = fake_chain()
+
+    result = run(engine, RECIPE)
+
+    assert result["is_approved"]
+    assert model.agents == ["HOOK GENERATOR"] + ["PERSONA SIMULATION"] * 3 + ["MANAGER AGENT", "FINALIZER AGENT"]
+    assert result["metrics"]["llm_calls"] == model.calls == 6
+
+
+@pytest.mark.parametrize("engine", ["sync", "async"])
+def test_resume_after_manager_failure_calls_only_manager_and_finalizer(fake_chain, monkeypatch, tmp_path, engine):
+    monkeypatch.setattr(Config, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    fake_chain(fail_agent="MANAGER AGENT")
+    with pytest.raises(ValueError, match="MANAGER AGENT call failed"):
+        run(engine, RECIPE, run_id="resumed-run")
+
+    model = fake_chain()
+    result = run(engine, RECIPE, run_id="resumed-run")
+
+    assert model.agents == ["MANAGER AGENT", "FINALIZER AGENT"]
+    assert result["is_approved"] and result["final_output"]
+    app = chain.get_workflow()
+    assert not app.get_state({"configurable": {"thread_id": "resumed-run"}}).values
+
+
+def test_checkpoint_of_another_recipe_is_not_resumed(fake_chain, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    fake_chain(fail_agent="MANAGER AGENT")
+    with pytest.raises(ValueError):
+        chain.run_workflow(RECIPE, run_id="reused-run")
+
+    model = fake_chain()
+    chain.run_workflow("Crispy chili oil eggs for breakfast", run_id="reused-run")
+
+    assert model.agents[0] == "HOOK GENERATOR"
+    assert model.calls == 6
+
+
+def test_failed_manager_settles_speculation(fake_chain, monkeypatch):
+    monkeypatch.setattr(Config, "SPECULATIVE_FINALIZE", True)
+    fake_chain(fail_agent="MANAGER AGENT")
+    before = chain.get_speculation_stats()
+
+    with pytest.raises(ValueError):
+        chain.run_workflow(RECIPE)
+
+    after = chain.get_speculation_stats()
+    assert after["miss"] - before["miss"] == 1
+    assert after["hit"] == before["hit"]
+
+
+@pytest.mark.parametrize("verdicts, hits, misses", [
+    (["APPROVED: Strong hook."], 1, 0),
+    (["REJECTED: Payoff comes too late.", "APPROVED: Better."], 1, 1),
+])
+def test_speculation_hit_and_miss(fake_chain, monkeypatch, verdicts, hits, misses):
+    from benchmarks.fake_llm import DEFAULT_RESPONSES
+
+    monkeypatch.setattr(Config, "SPECULATIVE_FINALIZE", True)
+    model = fake_chain(responses={**DEFAULT_RESPONSES, "MANAGER AGENT": verdicts})
+    before = chain.get_speculation_stats()
+
+    result = chain.run_workflow(RECIPE)
+
+    after = chain.get_speculation_stats()
+    assert result["is_approved"]
+    assert (after["hit"] - before["hit"], after["miss"] - before["miss"]) == (hits, misses)
+    # At most one draft per manager call; a rejected draft that hadn't started yet is cancelled
+    assert 1 <= model.agents.count("FINALIZER AGENT") <= len(verdicts)
+
+
+def test_async_cache_io_runs_off_the_event_loop(fake_chain, monkeypatch, tmp_path):
+    import threading
+
+    import llm_cache
+
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    fake_chain()
+    threads = {}
+    for name in ("_cached_response", "_record_response"):
+        def wrapper(node, *args, _call=getattr(chain, name), _name=name):
+            threads.setdefault((_name, node), set()).add(threading.current_thread() is threading.main_thread())
+            return _call(node, *args)
+        monkeypatch.setattr(chain, name, wrapper)
+
+    asyncio.run(chain.arun_workflow(RECIPE))
+
+    # Cacheable nodes touch SQLite in a worker thread; the bypassed generator stays on the loop
+    assert threads[("_cached_response", "manager_evaluation")] == {False}
+    assert threads[("_record_response", "verify_personas")] == {False}
+    assert threads[("_cached_response", "generate_hook")] == {True}